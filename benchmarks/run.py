@@ -0,0 +1,173 @@
+"""Benchmark Yak Barber builds on synthetic sites.
+
+Usage:
+    python -m benchmarks.run --sizes 1000 10000 --output results.json
+    python -m benchmarks.run --sizes 1000 --baseline results.json
+
+Each site size is timed for a cold full build, a no-op incremental rebuild
+and an incremental rebuild after editing one post. Every scenario records
+wall and CPU time plus the per-phase timings from the build report. Results
+are written as JSON. With --baseline, each scenario is compared with the
+matching baseline entry and slowdowns beyond --threshold are flagged.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+import tempfile
+
+from yakbarber import __version__
+from yakbarber.settings import load_settings
+from yakbarber.engine import build
+
+from .synthetic import generate_site
+
+SCENARIOS = ('full', 'noop', 'edit')
+
+
+def _edit_post(settings, n):
+    path = os.path.join(settings.content_dir, 'post-000000.md')
+    if not os.path.exists(path):
+        path = os.path.join(settings.content_dir, '2010', '01', 'post-000000.md')
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f'\nBenchmark edit {n}.\n')
+
+
+def run_scenario(settings, scenario, n):
+    """Run one timed build for scenario and return its BuildStats."""
+    if scenario == 'full':
+        shutil.rmtree(settings.output_dir, ignore_errors=True)
+        shutil.rmtree(settings.cache_dir, ignore_errors=True)
+        settings.incremental = False
+    else:
+        settings.incremental = True
+        if scenario == 'edit':
+            _edit_post(settings, n)
+    return build(settings)
+
+
+def bench_size(root, size, repeat, jobs, sharded=False):
+    """Benchmark every scenario for one site size.
+
+    Returns:
+        List of result dicts, one per scenario, holding the median of repeat runs.
+    """
+    settings = load_settings(generate_site(os.path.join(root, str(size)), size, sharded=sharded))
+    settings.jobs = jobs
+    results = []
+    for scenario in SCENARIOS:
+        if scenario != 'full':
+            # Prime the incremental manifest.
+            settings.incremental = True
+            build(settings)
+        runs = [run_scenario(settings, scenario, n) for n in range(repeat)]
+        median = sorted(runs, key=lambda s: s.wall)[len(runs) // 2]
+        results.append({
+            'size': size,
+            'scenario': scenario,
+            'jobs': jobs,
+            'wall': statistics.median(s.wall for s in runs),
+            'cpu': statistics.median(s.cpu for s in runs),
+            'phases': median.phases,
+            'counters': median.counters,
+        })
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'yakbarber': __version__,
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Compare results with a baseline run.
+
+    Returns:
+        (lines, regressions) where lines is a printable comparison and
+        regressions counts scenarios slower than the baseline by more than
+        threshold (a fraction).
+    """
+    previous = {(r['size'], r['scenario'], r['jobs']): r for r in baseline['results']}
+    lines = []
+    regressions = 0
+    for r in results:
+        old = previous.get((r['size'], r['scenario'], r['jobs']))
+        if old is None or not old['wall']:
+            continue
+        change = (r['wall'] - old['wall']) / old['wall']
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        lines.append(
+            f"{r['size']:>8} {r['scenario']:<6} {old['wall']:>9.3f}s -> {r['wall']:>9.3f}s "
+            f"({change:+.1%}){flag}"
+        )
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Yak Barber on synthetic sites.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000],
+                        help='Numbers of posts to benchmark (default: 1000).')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per scenario; the median is recorded (default: 3).')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes for the builds (default: 1).')
+    parser.add_argument('--sharded', action='store_true',
+                        help='Store posts in year/month content subdirectories.')
+    parser.add_argument('--workdir',
+                        help='Directory for generated sites (default: a temporary directory).')
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--baseline', help='Compare with results from an earlier run.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Slowdown fraction reported as a regression (default: 0.1).')
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        root = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        results = []
+        for size in args.sizes:
+            for r in bench_size(root, size, args.repeat, args.jobs, args.sharded):
+                print(f"{r['size']:>8} {r['scenario']:<6} wall {r['wall']:.3f}s  cpu {r['cpu']:.3f}s")
+                results.append(r)
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        lines, regressions = compare(results, baseline, args.threshold)
+        print('\n'.join(lines))
+        if regressions:
+            print(f"{regressions} scenario(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Synthetic site generator for Yak Barber benchmarks.
+
+Sites are generated deterministically from a seed, so two runs with the same
+arguments build exactly the same content.
+"""
+
+import os
+import random
+import shutil
+import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TEMPLATES = os.path.join(REPO_ROOT, 'templates', 'default')
+
+WORDS = (
+    'yak barber static site markdown template render feed archive index post '
+    'shave fiddly time sink blog engine mustache atom image link code build '
+    'cache hash page slug date title category author watch serve output'
+).split()
+
+CATEGORIES = ('Text', 'Links', 'Photos', 'Code', 'Travel', 'Notes')
+
+# A 1x1 transparent PNG, enough for image references to resolve to a real file.
+PIXEL_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+SETTINGS_TEMPLATE = '''[site]
+web_root = "https://bench.example.com/"
+content_dir = "{root}/content/"
+template_dir = "{root}/templates/"
+output_dir = "{root}/output/"
+site_name = "Benchmark Site"
+author = "Benchmark Author"
+ogp_default_image = "https://bench.example.com/images/default.jpg"
+posts_per_page = 10
+
+[build]
+cache_dir = "{root}/cache/"
+'''
+
+
+def _sentence(rng, words=12):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraph(rng):
+    return ' '.join(_sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(3, 7)))
+
+
+def _code_block(rng):
+    lines = [f'def {rng.choice(WORDS)}_{i}(value):\n    return value * {i}' for i in range(rng.randint(2, 6))]
+    return '```python\n' + '\n\n'.join(lines) + '\n```'
+
+
+def post_date(index):
+    return datetime.datetime(2010, 1, 1) + datetime.timedelta(hours=7 * index)
+
+
+def post_body(rng, index):
+    """Return the markdown source for synthetic post number index."""
+    kind = index % 10
+    date = post_date(index)
+    title = f'{_sentence(rng, rng.randint(3, 7))[:-1]} {index}'
+    lines = [
+        f'Title: {title}',
+        f'Date: {date:%Y-%m-%d %H:%M:%S}',
+        'Author: Benchmark Author',
+        f'Category: {CATEGORIES[index % len(CATEGORIES)]}',
+    ]
+    if kind == 0:
+        lines.append(f'Link: https://example.org/articles/{index}')
+    if kind == 1:
+        lines.append('Image: images/pixel.png')
+    lines.append('')
+    paragraphs = rng.randint(2, 6)
+    if kind == 2:
+        # Long-form post.
+        paragraphs = rng.randint(30, 60)
+    for p in range(paragraphs):
+        lines.append(_paragraph(rng))
+        lines.append('')
+        if kind == 3 and p % 2 == 0:
+            lines.append(_code_block(rng))
+            lines.append('')
+        if kind == 1 and p == 0:
+            lines.append(f'![Photo {index}](images/pixel.png)')
+            lines.append('')
+    if kind == 4:
+        lines.append(f'## Section {index}')
+        lines.append('')
+        lines.extend(f'- {_sentence(rng, 5)}' for _ in range(5))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_site(root, posts, seed=0, templates=DEFAULT_TEMPLATES, sharded=False):
+    """Generate a synthetic site with the given number of posts under root.
+
+    Every tenth post is a link post, and others carry images, code blocks,
+    lists or long bodies. With sharded, posts are stored in year/month
+    subdirectories of the content directory.
+
+    Returns:
+        Path to the generated settings.toml.
+    """
+    root = os.path.abspath(root)
+    content_dir = os.path.join(root, 'content')
+    os.makedirs(os.path.join(content_dir, 'images'), exist_ok=True)
+    with open(os.path.join(content_dir, 'images', 'pixel.png'), 'wb') as f:
+        f.write(PIXEL_PNG)
+    rng = random.Random(seed)
+    for i in range(posts):
+        post_dir = content_dir
+        if sharded:
+            post_dir = os.path.join(content_dir, f'{post_date(i):%Y}', f'{post_date(i):%m}')
+            os.makedirs(post_dir, exist_ok=True)
+        with open(os.path.join(post_dir, f'post-{i:06d}.md'), 'w', encoding='utf-8') as f:
+            f.write(post_body(rng, i))
+    with open(os.path.join(content_dir, 'about.markdown'), 'w', encoding='utf-8') as f:
+        f.write('About the benchmark site.\n\n' + _paragraph(rng) + '\n')
+    template_dir = os.path.join(root, 'templates')
+    if os.path.exists(template_dir):
+        shutil.rmtree(template_dir)
+    shutil.copytree(templates, template_dir)
+    settings_path = os.path.join(root, 'settings.toml')
+    with open(settings_path, 'w', encoding='utf-8') as f:
+        f.write(SETTINGS_TEMPLATE.format(root=root.replace(os.sep, '/')))
+    return settings_path
@@ -0,0 +1,134 @@
+/* Client for the search index Yak Barber writes to search/ (see yakbarber/search.py). */
+(function (root) {
+  'use strict';
+
+  var STOP_WORDS = new Set((
+    'a an and are as at be but by for from has have he i in is it its of on or ' +
+    'she that the their them they this to was were will with you your').split(' '));
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []).filter(function (t) {
+      return t.length > 1 && t.length <= 32 && !STOP_WORDS.has(t);
+    });
+  }
+
+  function fnv1a(term) {
+    var bytes = new TextEncoder().encode(term);
+    var h = 0x811c9dc5;
+    for (var i = 0; i < bytes.length; i++) {
+      h = Math.imul(h ^ bytes[i], 0x01000193) >>> 0;
+    }
+    return h;
+  }
+
+  // Decode base64 varints of (doc id delta, frequency) pairs into a Map of doc id to frequency.
+  function decode(data) {
+    var bin = atob(data), postings = new Map(), numbers = [], n = 0, scale = 1, doc = 0;
+    for (var i = 0; i < bin.length; i++) {
+      var b = bin.charCodeAt(i);
+      n += (b & 0x7f) * scale;
+      scale *= 128;
+      if (!(b & 0x80)) {
+        numbers.push(n);
+        n = 0;
+        scale = 1;
+      }
+    }
+    for (var j = 0; j + 1 < numbers.length; j += 2) {
+      doc += numbers[j];
+      postings.set(doc, numbers[j + 1]);
+    }
+    return postings;
+  }
+
+  function YakSearch(webRoot) {
+    this.base = webRoot.replace(/\/?$/, '/') + 'search/';
+    this.index = null;
+    this.shards = {};
+  }
+
+  YakSearch.prototype.fetchJSON = function (name) {
+    return fetch(this.base + name).then(function (response) {
+      if (!response.ok) {
+        throw new Error('Could not load ' + name);
+      }
+      return response.json();
+    });
+  };
+
+  YakSearch.prototype.shard = function (n) {
+    if (!this.shards[n]) {
+      this.shards[n] = this.fetchJSON('shard-' + String(n).padStart(3, '0') + '.json');
+    }
+    return this.shards[n];
+  };
+
+  // Resolve to posts containing every query term, best matches first.
+  YakSearch.prototype.search = function (query, limit) {
+    var self = this, terms = tokenize(query);
+    if (!terms.length) {
+      return Promise.resolve([]);
+    }
+    this.index = this.index || this.fetchJSON('docs.json');
+    return this.index.then(function (index) {
+      return Promise.all(terms.map(function (term) {
+        return self.shard(fnv1a(term) % index.shards).then(function (shard) {
+          return shard[term] ? decode(shard[term]) : new Map();
+        });
+      })).then(function (lists) {
+        lists.sort(function (a, b) { return a.size - b.size; });
+        var results = [];
+        lists[0].forEach(function (tf, doc) {
+          var score = tf;
+          for (var i = 1; i < lists.length; i++) {
+            if (!lists[i].has(doc)) {
+              return;
+            }
+            score += lists[i].get(doc);
+          }
+          var d = index.docs[doc];
+          if (d) {
+            results.push({title: d[0], url: d[1], date: d[2], score: score});
+          }
+        });
+        results.sort(function (a, b) {
+          return b.score - a.score || (a.date < b.date ? 1 : -1);
+        });
+        return results.slice(0, limit || 20);
+      });
+    });
+  };
+
+  // Wire up <form id="search-form" data-web-root="..."> and <ol id="search-results"> if present.
+  function attach() {
+    var form = document.getElementById('search-form');
+    var list = document.getElementById('search-results');
+    if (!form || !list) {
+      return;
+    }
+    var search = new YakSearch(form.getAttribute('data-web-root') || '/');
+    form.addEventListener('submit', function (event) {
+      event.preventDefault();
+      search.search(form.elements.q.value).then(function (results) {
+        list.textContent = '';
+        results.forEach(function (r) {
+          var item = document.createElement('li');
+          var link = document.createElement('a');
+          link.href = r.url;
+          link.textContent = r.title;
+          item.appendChild(link);
+          list.appendChild(item);
+        });
+      });
+    });
+  }
+
+  root.YakSearch = YakSearch;
+  if (root.document) {
+    if (document.readyState === 'loading') {
+      document.addEventListener('DOMContentLoaded', attach);
+    } else {
+      attach();
+    }
+  }
+})(window);
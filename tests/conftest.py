@@ -1,6 +1,7 @@
 """Shared test fixtures for yakbarber tests."""
 
 import os
+import shutil
 import pytest
 
 from yakbarber.settings import load_settings
@@ -14,7 +15,7 @@ def fixtures_dir():
 
 
 @pytest.fixture
-def test_settings(tmp_path):
+def test_settings(tmp_path, tmp_path_factory):
     """Load test settings with all paths resolved to absolute locations.
 
     This ensures tests are fully isolated from the live site regardless
@@ -22,6 +23,21 @@ def test_settings(tmp_path):
     """
     settings = load_settings(os.path.join(FIXTURES_DIR, 'settings.toml'))
     settings.output_dir = str(tmp_path) + '/'
+    settings.cache_dir = str(tmp_path_factory.mktemp('cache')) + '/'
     settings.content_dir = os.path.join(FIXTURES_DIR, 'content') + '/'
     settings.template_dir = os.path.join(FIXTURES_DIR, 'templates', 'default') + '/'
     return settings
+
+
+@pytest.fixture
+def writable_settings(test_settings, tmp_path):
+    """Test settings with writable copies of the fixture content and templates.
+
+    Output goes to tmp_path/output, next to the copies.
+    """
+    shutil.copytree(test_settings.content_dir, tmp_path / 'content')
+    shutil.copytree(test_settings.template_dir, tmp_path / 'templates')
+    test_settings.content_dir = str(tmp_path / 'content') + '/'
+    test_settings.template_dir = str(tmp_path / 'templates') + '/'
+    test_settings.output_dir = str(tmp_path / 'output') + '/'
+    return test_settings
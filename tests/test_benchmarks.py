@@ -0,0 +1,48 @@
+"""Smoke tests for the benchmark harness."""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import generate_site
+from benchmarks.run import main, compare
+from yakbarber.settings import load_settings
+
+
+class TestGenerateSite:
+    def test_is_deterministic(self, tmp_path):
+        generate_site(tmp_path / 'a', 12)
+        generate_site(tmp_path / 'b', 12)
+        names = sorted(os.listdir(tmp_path / 'a' / 'content'))
+        assert names == sorted(os.listdir(tmp_path / 'b' / 'content'))
+        for name in names:
+            if name.endswith('.md'):
+                a = (tmp_path / 'a' / 'content' / name).read_text()
+                assert a == (tmp_path / 'b' / 'content' / name).read_text()
+
+    def test_settings_load(self, tmp_path):
+        settings = load_settings(generate_site(tmp_path, 3))
+        assert settings.content_dir.startswith(str(tmp_path))
+        assert len([n for n in os.listdir(settings.content_dir) if n.startswith('post-')]) == 3
+
+
+class TestRun:
+    def test_writes_results_and_compares(self, tmp_path, capsys):
+        output = tmp_path / 'results.json'
+        assert main(['--sizes', '20', '--repeat', '1', '--workdir', str(tmp_path / 'sites'),
+                     '--output', str(output)]) == 0
+        report = json.loads(output.read_text())
+        assert [r['scenario'] for r in report['results']] == ['full', 'noop', 'edit']
+        assert 'process_posts' in report['results'][0]['phases']
+        assert os.path.exists(tmp_path / 'sites' / '20' / 'output' / 'index.html')
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': [{'size': 10, 'scenario': 'full', 'jobs': 1, 'wall': 1.0}]}
+        results = [{'size': 10, 'scenario': 'full', 'jobs': 1, 'wall': 1.5}]
+        lines, regressions = compare(results, baseline, 0.1)
+        assert regressions == 1
+        assert 'REGRESSION' in lines[0]
+        _, regressions = compare(results, baseline, 0.6)
+        assert regressions == 0
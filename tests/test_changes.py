@@ -0,0 +1,88 @@
+"""Tests for yakbarber.changes and partial rebuilds."""
+
+import os
+import pytest
+
+from yakbarber.changes import ChangeSet, changes_for_paths
+from yakbarber.engine import build
+
+
+@pytest.fixture
+def site_settings(writable_settings):
+    writable_settings.incremental = True
+    return writable_settings
+
+
+class TestChangesForPaths:
+    def test_post_change(self, site_settings):
+        path = os.path.join(site_settings.content_dir, '2024-01-15-Example-Post.md')
+        changes = changes_for_paths([path], site_settings)
+        assert changes.posts == {'2024-01-15-Example-Post.md'}
+        assert not changes.full
+
+    def test_sharded_post_change(self, site_settings):
+        path = os.path.join(site_settings.content_dir, '2024', '01', 'about.markdown')
+        changes = changes_for_paths([path], site_settings)
+        assert changes.posts == {os.path.join('2024', '01', 'about.markdown')}
+        assert not changes.about
+
+    def test_about_change(self, site_settings):
+        changes = changes_for_paths([site_settings.content_dir + 'about.markdown'], site_settings)
+        assert changes.about
+        assert not changes.posts
+
+    def test_template_change_is_full(self, site_settings):
+        changes = changes_for_paths([site_settings.template_dir + 'index.html'], site_settings)
+        assert changes.full
+
+    def test_resource_change(self, site_settings):
+        changes = changes_for_paths([site_settings.template_dir + 'main.css'], site_settings)
+        assert changes.resources
+        assert not changes.full
+
+    def test_fingerprinted_resource_change_is_full(self, site_settings):
+        site_settings.fingerprint_assets = True
+        changes = changes_for_paths([site_settings.template_dir + 'main.css'], site_settings)
+        assert changes.full
+
+    def test_ignores_editor_files(self, site_settings):
+        paths = [
+            site_settings.content_dir + '.post.md.swp',
+            site_settings.content_dir + 'post.md~',
+            site_settings.content_dir + 'notes.txt',
+        ]
+        assert not changes_for_paths(paths, site_settings)
+
+    def test_empty_change_set_is_falsy(self):
+        assert not ChangeSet()
+        assert ChangeSet(about=True)
+
+
+class TestPartialBuild:
+    def test_rebuilds_only_the_changed_post(self, site_settings):
+        build(site_settings)
+        output = site_settings.output_dir
+        edited = os.path.join(site_settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(edited, 'a', encoding='utf-8') as f:
+            f.write('\nAn edit made in watch mode.\n')
+        untouched = os.path.join(output, '2024-02-20-A-Link-Post.html')
+        os.utime(untouched, (0, 0))
+        os.utime(os.path.join(output, 'about.html'), (0, 0))
+        stats = build(site_settings, changes_for_paths([edited], site_settings))
+        with open(os.path.join(output, '2024-01-15-Example-Post.html'), encoding='utf-8') as f:
+            assert 'An edit made in watch mode.' in f.read()
+        with open(os.path.join(output, 'feed.xml'), encoding='utf-8') as f:
+            assert 'An edit made in watch mode.' in f.read()
+        assert os.path.getmtime(untouched) == 0
+        assert os.path.getmtime(os.path.join(output, 'about.html')) == 0
+        assert stats.written >= 2
+
+    def test_new_post_is_picked_up(self, site_settings):
+        build(site_settings)
+        new_post = os.path.join(site_settings.content_dir, '2024-04-01-New.md')
+        with open(new_post, 'w', encoding='utf-8') as f:
+            f.write('Title: Brand New\nDate: 2024-04-01 10:00:00\n\nFresh.\n')
+        build(site_settings, changes_for_paths([new_post], site_settings))
+        assert os.path.exists(os.path.join(site_settings.output_dir, '2024-04-01-Brand-New.html'))
+        with open(os.path.join(site_settings.output_dir, 'index.html'), encoding='utf-8') as f:
+            assert 'Brand New' in f.read()
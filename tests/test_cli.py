@@ -0,0 +1,56 @@
+"""Tests for the command-line interface's startup path."""
+
+import os
+import sys
+import time
+import subprocess
+
+from yakbarber import __version__
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+# Modules only specific commands need; none may load for --version.
+HEAVY_MODULES = ['watchdog', 'bs4', 'markdown', 'pystache', 'pytz', 'yakbarber.engine']
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def loaded_modules(code):
+    """Return which of HEAVY_MODULES are in sys.modules after running code."""
+    result = run_python('-c', code + f'\nimport sys\nprint(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])')
+    return result.stdout.split()
+
+
+class TestStartup:
+    def test_version(self):
+        result = run_python('-m', 'yakbarber.cli', '--version')
+        assert result.stdout.strip() == f'Yak Barber {__version__}'
+
+    def test_version_imports_nothing_heavy(self):
+        code = (
+            "import io, sys, contextlib\n"
+            "sys.argv = ['yakbarber', '--version']\n"
+            "from yakbarber.cli import main\n"
+            "with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()):\n"
+            "    main()\n"
+        )
+        assert loaded_modules(code) == []
+
+    def test_engine_does_not_import_watchdog_or_bs4(self):
+        assert set(loaded_modules('import yakbarber.engine')) & {'watchdog', 'bs4'} == set()
+
+    def test_version_starts_quickly(self):
+        def fastest(*args):
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                run_python(*args)
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        # Measured against a bare interpreter, so a slow machine doesn't fail it.
+        overhead = fastest('-m', 'yakbarber.cli', '--version') - fastest('-c', 'pass')
+        assert overhead < 0.15
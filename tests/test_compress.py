@@ -0,0 +1,117 @@
+"""Tests for yakbarber.compress."""
+
+import os
+import gzip
+import shutil
+import pytest
+
+from yakbarber.engine import build
+from yakbarber.compress import minify_html, minify_css, precompress, CACHE_NAME
+
+
+class TestMinifyHtml:
+    def test_collapses_whitespace(self):
+        html = '<div>\n    <p>One   two</p>  <b>x</b>\n</div>\n'
+        assert minify_html(html) == '<div>\n<p>One two</p> <b>x</b>\n</div>'
+
+    def test_keeps_raw_elements_and_attributes(self):
+        html = ('<pre><code>a\n    b</code></pre>\n  <textarea>  x  </textarea>'
+                '<script>if (a  <  b) {}</script><a title="a  >  b">t</a>')
+        assert minify_html(html) == html.replace('\n  <textarea>', '\n<textarea>')
+
+    def test_drops_comments_but_not_conditional_comments(self):
+        html = '<p>a<!-- note --></p><!--[if IE]><p>ie</p><![endif]-->'
+        assert minify_html(html) == '<p>a</p><!--[if IE]><p>ie</p><![endif]-->'
+
+    def test_keeps_no_break_space(self):
+        assert minify_html('<p>a  b</p>') == '<p>a  b</p>'
+
+
+class TestMinifyCss:
+    def test_minifies(self):
+        css = '/* c */\nbody {\n  color: red;\n  margin: 0 auto;\n}\na > b, i { top: 0 }\n'
+        assert minify_css(css) == 'body{color:red;margin:0 auto}a>b,i{top:0}'
+
+    def test_keeps_strings_and_selector_spaces(self):
+        css = 'a :hover { content: "x  /* y */  ;}" }\np { width: calc(1px + 2px) }'
+        assert minify_css(css) == 'a :hover{content:"x  /* y */  ;}"}p{width:calc(1px + 2px)}'
+
+    def test_media_query_keeps_and(self):
+        css = '@media screen and (max-width: 600px) { p { top: 0; } }'
+        assert minify_css(css) == '@media screen and (max-width:600px){p{top:0}}'
+
+
+@pytest.fixture
+def compress_settings(writable_settings):
+    writable_settings.minify_output = True
+    writable_settings.gzip_output = True
+    return writable_settings
+
+
+class TestPrecompress:
+    def test_build_writes_minified_pages_and_gzip(self, compress_settings):
+        build(compress_settings)
+        page = os.path.join(compress_settings.output_dir, '2024-01-15-Example-Post.html')
+        with open(page, 'rb') as f:
+            data = f.read()
+        assert b'\n  ' not in data
+        with gzip.open(page + '.gz', 'rb') as f:
+            assert f.read() == data
+        assert os.path.exists(os.path.join(compress_settings.output_dir, 'feed.xml.gz'))
+
+    def test_minifies_template_resources(self, compress_settings):
+        with open(os.path.join(compress_settings.template_dir, 'main.css'), 'w', encoding='utf-8') as f:
+            f.write('body {\n  color: red;\n}\n')
+        build(compress_settings)
+        with open(os.path.join(compress_settings.output_dir, 'main.css'), encoding='utf-8') as f:
+            assert f.read() == 'body{color:red}'
+
+    def test_rebuild_reuses_compressed_files(self, compress_settings):
+        build(compress_settings)
+        sibling = os.path.join(compress_settings.output_dir, 'index.html.gz')
+        os.utime(sibling, (0, 0))
+        stats = build(compress_settings)
+        assert stats.written == 0
+        assert 'precompressed' not in stats.counters
+        assert os.path.getmtime(sibling) == 0
+
+    def test_same_bytes_are_not_recompressed(self, compress_settings):
+        build(compress_settings)
+        page = os.path.join(compress_settings.output_dir, 'index.html')
+        os.utime(page, (1, 1))
+        os.utime(page + '.gz', (0, 0))
+        precompress(compress_settings)
+        assert os.path.getmtime(page + '.gz') == 0
+
+    def test_missing_siblings_are_restored(self, compress_settings):
+        build(compress_settings)
+        output_dir = compress_settings.output_dir
+        expected = sorted(n for n in os.listdir(output_dir) if n.endswith('.gz'))
+        shutil.rmtree(output_dir)
+        build(compress_settings)
+        assert sorted(n for n in os.listdir(output_dir) if n.endswith('.gz')) == expected
+        os.remove(os.path.join(output_dir, 'index.html.gz'))
+        precompress(compress_settings)
+        assert os.path.exists(os.path.join(output_dir, 'index.html.gz'))
+
+    def test_removes_stale_siblings(self, compress_settings):
+        build(compress_settings)
+        output_dir = compress_settings.output_dir
+        with open(os.path.join(output_dir, 'download.tar.gz'), 'wb') as f:
+            f.write(b'not ours')
+        os.remove(os.path.join(output_dir, 'about.html'))
+        precompress(compress_settings)
+        assert not os.path.exists(os.path.join(output_dir, 'about.html.gz'))
+        compress_settings.gzip_output = False
+        build(compress_settings)
+        assert not os.path.exists(os.path.join(output_dir, 'index.html.gz'))
+        assert not os.path.exists(os.path.join(compress_settings.cache_dir, CACHE_NAME))
+        assert os.path.exists(os.path.join(output_dir, 'download.tar.gz'))
+
+    def test_brotli(self, compress_settings):
+        brotli = pytest.importorskip('brotli')
+        compress_settings.brotli_output = True
+        build(compress_settings)
+        page = os.path.join(compress_settings.output_dir, 'index.html')
+        with open(page, 'rb') as f, open(page + '.br', 'rb') as br:
+            assert brotli.decompress(br.read()) == f.read()
@@ -1,6 +1,7 @@
 """Tests for yakbarber.engine."""
 
 import os
+import json
 import pytest
 
 import markdown
@@ -10,12 +11,15 @@ from yakbarber.engine import (
     open_convert,
     process_posts,
     render_post,
+    render_posts,
     about_page,
     paginated_index,
     feed,
+    archive_index,
     build,
     _create_md_processor,
 )
+from yakbarber.manifest import BuildManifest
 
 
 @pytest.fixture
@@ -62,6 +66,12 @@ class TestProcessPosts:
         # Should find the 3 .md files (not about.markdown which has no title field)
         assert len(posts) == 3
 
+    def test_parallel_matches_serial(self, test_settings, md_processor):
+        serial = process_posts(test_settings, md_processor)
+        test_settings.jobs = 2
+        parallel = process_posts(test_settings, md_processor)
+        assert parallel == serial
+
 
 class TestRenderPost:
     @pytest.mark.asyncio
@@ -89,8 +99,27 @@ class TestRenderPost:
         metadata = await render_post(result, test_settings)
         assert metadata['image'] == 'https://example.com/images/custom.jpg'
 
+    @pytest.mark.asyncio
+    async def test_render_posts_keeps_order(self, test_settings, md_processor):
+        posts = process_posts(test_settings, md_processor)
+        test_settings.render_concurrency = 2
+        rendered = await render_posts(posts, test_settings)
+        assert [m['title'] for m in rendered] == [p[0]['title'][0] for p in posts]
+        for metadata in rendered:
+            assert os.path.exists(
+                os.path.join(test_settings.output_dir, os.path.basename(metadata['postURL']))
+            )
+
+    @pytest.mark.asyncio
+    async def test_render_posts_empty(self, test_settings):
+        assert await render_posts([], test_settings) == []
+
 
 class TestFullBuild:
+    def test_build_prints_nothing(self, test_settings, capsys):
+        build(test_settings)
+        assert capsys.readouterr().out == ''
+
     def test_build_creates_output(self, test_settings):
         build(test_settings)
         output_dir = test_settings.output_dir
@@ -111,6 +140,56 @@ class TestFullBuild:
         assert os.path.exists(os.path.join(output_dir, 'index.html'))
         assert os.path.exists(os.path.join(output_dir, 'index2.html'))
 
+    def test_last_page_has_no_older_link(self, test_settings):
+        build(test_settings)
+        with open(os.path.join(test_settings.output_dir, 'index2.html'), encoding='utf-8') as f:
+            last = f.read()
+        assert 'Older Posts' not in last
+        assert 'index3.html' not in last
+        assert 'https://example.com/index.html' in last
+
+    def test_removes_stale_pages(self, test_settings):
+        test_settings.posts_per_page = 1
+        build(test_settings)
+        assert os.path.exists(os.path.join(test_settings.output_dir, 'index3.html'))
+        test_settings.posts_per_page = 2
+        build(test_settings)
+        assert not os.path.exists(os.path.join(test_settings.output_dir, 'index3.html'))
+
+    def test_stable_pagination(self, test_settings):
+        test_settings.posts_per_page = 1
+        test_settings.pagination = 'stable'
+        build(test_settings)
+        output_dir = test_settings.output_dir
+        pages = sorted(n for n in os.listdir(output_dir) if n.startswith(('index', 'page')))
+        assert pages == ['index.html', 'page1.html', 'page2.html']
+        with open(os.path.join(output_dir, 'page2.html'), encoding='utf-8') as f:
+            middle = f.read()
+        assert 'https://example.com/page1.html' in middle
+        assert 'https://example.com/index.html' in middle
+
+    def test_parallel_build_is_identical(self, test_settings, tmp_path):
+        test_settings.output_dir = str(tmp_path / 'serial') + '/'
+        build(test_settings)
+        test_settings.output_dir = str(tmp_path / 'parallel') + '/'
+        test_settings.jobs = 2
+        build(test_settings)
+        for name in ('index.html', 'index2.html', '2024-01-15-Example-Post.html'):
+            with open(os.path.join(tmp_path, 'serial', name), encoding='utf-8') as f:
+                serial = f.read()
+            with open(os.path.join(tmp_path, 'parallel', name), encoding='utf-8') as f:
+                assert f.read() == serial
+
+    def test_rebuild_skips_unchanged_files(self, test_settings):
+        first = build(test_settings)
+        assert first.written > 0
+        post_file = os.path.join(test_settings.output_dir, '2024-01-15-Example-Post.html')
+        os.utime(post_file, (0, 0))
+        second = build(test_settings)
+        assert second.written == 0
+        assert second.unchanged == first.written
+        assert os.path.getmtime(post_file) == 0
+
     def test_feed_contains_entries(self, test_settings):
         build(test_settings)
         feed_path = os.path.join(test_settings.output_dir, 'feed.xml')
@@ -118,3 +197,177 @@ class TestFullBuild:
             content = f.read()
         assert '<entry>' in content
         assert 'Example Post' in content
+
+    def test_feed_strips_configured_tags(self, test_settings, tmp_path):
+        content_dir = tmp_path / 'content'
+        content_dir.mkdir()
+        (content_dir / 'about.markdown').write_text('About.\n')
+        (content_dir / 'embed.md').write_text(
+            'Title: Embed\nDate: 2024-05-01 10:00:00\n\n'
+            '<p>Keep me</p>\n\n<iframe src="https://example.org/"></iframe>\n'
+        )
+        test_settings.content_dir = str(content_dir) + '/'
+        test_settings.output_dir = str(tmp_path / 'output') + '/'
+        build(test_settings)
+        with open(os.path.join(test_settings.output_dir, 'feed.xml'), encoding='utf-8') as f:
+            content = f.read()
+        assert 'Keep me' in content
+        assert '<iframe' not in content
+
+    def test_feed_title_with_ampersands(self, test_settings, tmp_path):
+        content_dir = tmp_path / 'content'
+        content_dir.mkdir()
+        (content_dir / 'about.markdown').write_text('About.\n')
+        (content_dir / 'att.md').write_text('Title: AT&T and R&D news\nDate: 2024-05-01 10:00:00\n\nBody.\n')
+        test_settings.content_dir = str(content_dir) + '/'
+        test_settings.output_dir = str(tmp_path / 'output') + '/'
+        build(test_settings)
+        with open(os.path.join(test_settings.output_dir, 'feed.xml'), encoding='utf-8') as f:
+            content = f.read()
+        assert '<title>AT&T and R&D news</title>' in content
+
+    def test_feed_entry_limit(self, test_settings):
+        test_settings.feed_entries = 2
+        build(test_settings)
+        with open(os.path.join(test_settings.output_dir, 'feed.xml'), encoding='utf-8') as f:
+            content = f.read()
+        assert content.count('<entry>') == 2
+        assert content.rstrip().endswith('</feed>')
+        assert not os.path.exists(os.path.join(test_settings.output_dir, 'feed-archive.xml'))
+
+    def test_feed_archive(self, test_settings):
+        test_settings.feed_entries = 1
+        test_settings.feed_archive = True
+        build(test_settings)
+        with open(os.path.join(test_settings.output_dir, 'feed-archive.xml'), encoding='utf-8') as f:
+            content = f.read()
+        assert content.count('<entry>') == 3
+        assert content.startswith('<?xml')
+
+
+class TestArchives:
+    def test_archive_index_groups_in_order(self, test_settings):
+        posts = [
+            {'title': 'c', 'date': '2024-03-02 10:00:00', 'postURL': 'c.html', 'category': 'Python',
+             'tag-pages': [{'tag': 'web'}, {'tag': 'Web Dev'}]},
+            {'title': 'b', 'date': '2024-03-01 10:00:00', 'postURL': 'b.html', 'category': 'python',
+             'tag-pages': [{'tag': 'web'}]},
+            {'title': 'a', 'date': '2023-12-31 10:00:00', 'postURL': 'a.html', 'category': 'Travel'},
+        ]
+        index, _ = archive_index(posts, test_settings)
+        assert index['category']['python'][0] == 'Python'
+        assert [p['title'] for p in index['category']['python'][1]] == ['c', 'b']
+        assert [p['title'] for p in index['category']['travel'][1]] == ['a']
+        assert sorted(index['tag']) == ['web', 'web-dev']
+        assert len(index['tag']['web'][1]) == 2
+        assert list(index['year']) == ['2024', '2023']
+        assert index['month']['2024/03'][0] == 'March 2024'
+        assert [p['title'] for p in index['month']['2024/03'][1]] == ['c', 'b']
+
+    def test_archive_index_lists_entries(self, test_settings):
+        posts = [{'title': 'A', 'date': '2024-03-02 10:00:00', 'postURL': 'a.html', 'category': 'Notes'}]
+        _, entries = archive_index(posts, test_settings)
+        assert entries == [{'title': 'A', 'date': '2024-03-02 10:00:00', 'url': 'a.html', 'category': 'Notes'}]
+
+    def test_disabled_archives_are_empty(self, test_settings):
+        test_settings.archive_categories = False
+        test_settings.archive_tags = False
+        test_settings.archive_dates = False
+        test_settings.post_index_json = False
+        posts = [{'date': '2024-01-01', 'category': 'Python', 'tag-pages': [{'tag': 'web'}]}]
+        index, entries = archive_index(posts, test_settings)
+        assert all(not terms for terms in index.values())
+        assert entries == []
+
+    def test_build_creates_category_pages_and_feeds(self, test_settings):
+        build(test_settings)
+        category_dir = os.path.join(test_settings.output_dir, 'category')
+        assert sorted(os.listdir(category_dir)) == ['links', 'text']
+        with open(os.path.join(category_dir, 'text', 'index.html'), encoding='utf-8') as f:
+            page = f.read()
+        assert 'Example Post' in page
+        assert 'A Link Post' not in page
+        with open(os.path.join(category_dir, 'links', 'feed.xml'), encoding='utf-8') as f:
+            content = f.read()
+        assert content.count('<entry>') == 1
+        assert 'https://example.com/category/links/feed.xml' in content
+
+    def test_archive_pagination(self, test_settings):
+        test_settings.posts_per_page = 1
+        build(test_settings)
+        text_dir = os.path.join(test_settings.output_dir, 'category', 'text')
+        assert sorted(os.listdir(text_dir)) == ['feed.xml', 'index.html', 'index2.html']
+        with open(os.path.join(text_dir, 'index.html'), encoding='utf-8') as f:
+            first = f.read()
+        assert 'category/text/index2.html' in first
+        assert 'Newer Posts' not in first
+        with open(os.path.join(text_dir, 'index2.html'), encoding='utf-8') as f:
+            second = f.read()
+        assert 'category/text/index.html' in second
+        assert 'Older Posts' not in second
+
+    def test_tag_pages(self, test_settings, tmp_path):
+        content_dir = tmp_path / 'content'
+        content_dir.mkdir()
+        (content_dir / 'about.markdown').write_text('About.\n')
+        (content_dir / 'tagged.md').write_text(
+            'Title: Tagged\nDate: 2024-05-01 10:00:00\nTags: Python, Static Sites\n\nBody.\n'
+        )
+        test_settings.content_dir = str(content_dir) + '/'
+        test_settings.output_dir = str(tmp_path / 'output') + '/'
+        build(test_settings)
+        tag_dir = os.path.join(test_settings.output_dir, 'tag')
+        assert sorted(os.listdir(tag_dir)) == ['python', 'static-sites']
+        with open(os.path.join(tag_dir, 'static-sites', 'index.html'), encoding='utf-8') as f:
+            assert 'Tag: Static Sites' in f.read()
+
+    def test_removes_archives_without_posts(self, test_settings, tmp_path):
+        content_dir = tmp_path / 'content'
+        content_dir.mkdir()
+        (content_dir / 'about.markdown').write_text('About.\n')
+        (content_dir / 'keep.md').write_text('Title: Keep\nDate: 2024-05-01 10:00:00\nCategory: text\n\nBody.\n')
+        solo = content_dir / 'solo.md'
+        solo.write_text('Title: Solo\nDate: 2023-02-01 10:00:00\nCategory: Solo\nTags: rare\n\nBody.\n')
+        test_settings.content_dir = str(content_dir) + '/'
+        test_settings.output_dir = str(tmp_path / 'output') + '/'
+        test_settings.incremental = True
+        build(test_settings)
+        out = test_settings.output_dir
+        assert os.path.exists(out + 'category/solo/feed.xml')
+        assert os.path.exists(out + 'archive/2023/02/index.html')
+        solo.write_text('Title: Solo\nDate: 2024-06-01 10:00:00\nCategory: text\n\nBody.\n')
+        build(test_settings)
+        assert sorted(os.listdir(out + 'category')) == ['text']
+        assert os.listdir(out + 'tag') == []
+        assert sorted(os.listdir(out + 'archive')) == ['2024', 'index.html']
+        assert sorted(os.listdir(out + 'archive/2024')) == ['05', '06', 'index.html']
+        outputs = BuildManifest.load(test_settings).outputs
+        assert not [o for o in outputs if '/solo/' in o or '/2023/' in o]
+
+    def test_date_archives(self, test_settings):
+        build(test_settings)
+        archive_dir = os.path.join(test_settings.output_dir, 'archive')
+        assert sorted(os.listdir(archive_dir)) == ['2024', 'index.html']
+        assert sorted(os.listdir(os.path.join(archive_dir, '2024'))) == ['01', '02', '03', 'index.html', 'index2.html']
+        with open(os.path.join(archive_dir, 'index.html'), encoding='utf-8') as f:
+            assert 'https://example.com/archive/2024/index.html' in f.read()
+        with open(os.path.join(archive_dir, '2024', 'index.html'), encoding='utf-8') as f:
+            year = f.read()
+        assert 'https://example.com/archive/2024/02/index.html' in year
+        assert 'Post With Image' in year
+        with open(os.path.join(archive_dir, '2024', '02', 'index.html'), encoding='utf-8') as f:
+            month = f.read()
+        assert 'Archive: February 2024' in month
+        assert 'A Link Post' in month
+        assert 'Example Post' not in month
+
+    def test_post_index_json(self, test_settings):
+        build(test_settings)
+        with open(os.path.join(test_settings.output_dir, 'posts.json'), encoding='utf-8') as f:
+            entries = json.load(f)
+        assert [e['url'] for e in entries] == [
+            'https://example.com/2024-03-10-Post-With-Image.html',
+            'https://example.com/2024-02-20-A-Link-Post.html',
+            'https://example.com/2024-01-15-Example-Post.html',
+        ]
+        assert entries[1]['category'] == 'links'
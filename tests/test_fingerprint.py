@@ -0,0 +1,100 @@
+"""Tests for yakbarber.fingerprint."""
+
+import os
+import pytest
+
+from yakbarber.engine import build
+from yakbarber.fingerprint import StaticAssets, asset_key
+
+
+@pytest.fixture
+def asset_settings(writable_settings, tmp_path):
+    """Test settings with a writable template directory holding main.css."""
+    template_dir = tmp_path / 'templates'
+    (template_dir / 'main.css').write_text('body { color: red; }\n')
+    (template_dir / 'post-page.html').write_text(
+        '<link rel="stylesheet" href="{{asset.main_css}}">\n'
+        '<link rel="stylesheet" href="{{webRoot}}main.css">\n'
+        '<div>{{{post-content}}}</div>\n'
+    )
+    writable_settings.fingerprint_assets = True
+    return writable_settings
+
+
+def read(settings, name):
+    with open(os.path.join(settings.output_dir, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class TestStaticAssets:
+    def test_asset_key(self):
+        assert asset_key('main.css') == 'main_css'
+        assert asset_key('highlight.pack.js') == 'highlight_pack_js'
+
+    def test_names_and_urls(self, asset_settings):
+        assets = StaticAssets(asset_settings)
+        published = assets.names['main.css']
+        assert published.startswith('main.') and published.endswith('.css')
+        assert len(published) == len('main..css') + 10
+        assert assets.urls['main_css'] == 'https://example.com/' + published
+        assert 'index.html' not in assets.names
+
+    def test_unfingerprinted_names(self, asset_settings):
+        asset_settings.fingerprint_assets = False
+        assets = StaticAssets(asset_settings)
+        assert assets.names['main.css'] == 'main.css'
+        assert assets.urls['main_css'] == 'https://example.com/main.css'
+
+    def test_hash_follows_content_and_minification(self, asset_settings):
+        assets = StaticAssets(asset_settings)
+        first = assets.names['main.css']
+        with open(asset_settings.template_dir + 'main.css', 'a') as f:
+            f.write('p { margin: 0; }\n')
+        assets.refresh()
+        assert assets.names['main.css'] != first
+        asset_settings.minify_output = True
+        assert StaticAssets(asset_settings).names['main.css'] != assets.names['main.css']
+
+    def test_rewrite(self, asset_settings):
+        assets = StaticAssets(asset_settings)
+        published = assets.names['main.css']
+        html = '<a href="https://example.com/main.css"></a><a href=\'https://example.com/main.css\'></a>'
+        assert assets.rewrite(html).count(published) == 2
+        assert assets.rewrite('see https://example.com/main.css') == 'see https://example.com/main.css'
+
+    def test_is_stale(self, asset_settings):
+        assets = StaticAssets(asset_settings)
+        assert assets.is_stale('main.0123456789.css')
+        assert not assets.is_stale(assets.names['main.css'])
+        assert not assets.is_stale('other.0123456789.css')
+        assert not assets.is_stale('main.css')
+
+
+class TestFingerprintedBuild:
+    def test_pages_link_fingerprinted_copies(self, asset_settings):
+        build(asset_settings)
+        published = StaticAssets(asset_settings).names['main.css']
+        assert read(asset_settings, published) == read(asset_settings, 'main.css')
+        page = read(asset_settings, '2024-01-15-Example-Post.html')
+        assert page.count('https://example.com/' + published) == 2
+        assert 'https://example.com/main.css' not in page
+
+    def test_changed_resource_replaces_old_copy(self, asset_settings):
+        asset_settings.incremental = True
+        build(asset_settings)
+        old = StaticAssets(asset_settings).names['main.css']
+        with open(asset_settings.template_dir + 'main.css', 'w') as f:
+            f.write('body { color: blue; }\n')
+        build(asset_settings)
+        new = StaticAssets(asset_settings).names['main.css']
+        assert new != old
+        assert not os.path.exists(asset_settings.output_dir + old)
+        assert new in read(asset_settings, '2024-01-15-Example-Post.html')
+
+    def test_disabling_removes_copies(self, asset_settings):
+        build(asset_settings)
+        published = StaticAssets(asset_settings).names['main.css']
+        asset_settings.fingerprint_assets = False
+        build(asset_settings)
+        assert not os.path.exists(asset_settings.output_dir + published)
+        assert 'https://example.com/main.css' in read(asset_settings, '2024-01-15-Example-Post.html')
@@ -0,0 +1,100 @@
+"""Tests for yakbarber.fragments and cached conversions."""
+
+import os
+import pytest
+
+from markdown.extensions.toc import TocExtension
+
+from yakbarber.engine import build, convert_files, _create_md_processor
+from yakbarber.fragments import FragmentCache, FRAGMENT_CACHE_NAME, extension_key
+
+
+@pytest.fixture
+def cache_settings(writable_settings):
+    writable_settings.fragment_cache = True
+    return writable_settings
+
+
+def sources(settings):
+    return sorted(
+        os.path.join(settings.content_dir, name) for name in os.listdir(settings.content_dir)
+        if name.endswith('.md')
+    )
+
+
+class TestFragmentCache:
+    def test_round_trip(self, tmp_path):
+        source = tmp_path / 'post.md'
+        source.write_text('Title: A\n\nBody\n')
+        with FragmentCache(str(tmp_path / 'cache.sqlite'), {}, 1 << 20) as cache:
+            key = cache.key(str(source))
+            assert cache.get(key) == (False, None)
+            cache.put(key, [{'title': ['A']}, '<p>Body</p>'])
+            cache.put('none', None)
+        with FragmentCache(str(tmp_path / 'cache.sqlite'), {}, 1 << 20) as cache:
+            assert cache.get(key) == (True, [{'title': ['A']}, '<p>Body</p>'])
+            assert cache.get('none') == (True, None)
+            assert (cache.hits, cache.misses) == (2, 0)
+
+    def test_key_covers_config(self, tmp_path):
+        source = tmp_path / 'post.md'
+        source.write_text('Title: A\n')
+        path = str(tmp_path / 'cache.sqlite')
+        with FragmentCache(path, {'web_root': 'a'}, 1 << 20) as a, \
+                FragmentCache(path, {'web_root': 'b'}, 1 << 20) as b:
+            assert a.key(str(source)) != b.key(str(source))
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite')
+        with FragmentCache(path, {}, 1 << 20) as cache:
+            for name in ('old', 'used', 'new'):
+                cache.put(name, 'same payload')
+            size = cache._db.execute("SELECT size FROM fragments WHERE key = 'new'").fetchone()[0]
+        with FragmentCache(path, {}, size * 2) as cache:
+            cache.get('used')
+        with FragmentCache(path, {}, 1 << 20) as cache:
+            assert cache.get('old') == (False, None)
+            assert cache.get('used') == (True, 'same payload')
+            assert cache.get('new') == (True, 'same payload')
+
+    def test_extension_key(self):
+        first = extension_key(['meta', TocExtension(anchorlink=True)])
+        assert first == extension_key(['meta', TocExtension(anchorlink=True)])
+        assert first != extension_key(['meta', TocExtension(anchorlink=False)])
+
+
+class TestCachedConversion:
+    def test_matches_uncached(self, cache_settings):
+        md = _create_md_processor(cache_settings)
+        mdfiles = sources(cache_settings)
+        os.makedirs(cache_settings.output_dir)
+        first = convert_files(mdfiles, cache_settings, md)
+        second = convert_files(mdfiles, cache_settings, md)
+        cache_settings.fragment_cache = False
+        assert first == second == convert_files(mdfiles, cache_settings, md)
+
+    def test_cold_build_reuses_conversions(self, cache_settings):
+        build(cache_settings)
+        assert os.path.exists(cache_settings.cache_dir + FRAGMENT_CACHE_NAME)
+        stats = build(cache_settings)
+        assert stats.counters['fragment_cache_hits'] == 3
+        assert stats.counters['fragment_cache_misses'] == 0
+        assert stats.counters['posts_converted'] == 0
+
+    def test_edited_source_is_converted(self, cache_settings):
+        build(cache_settings)
+        post = os.path.join(cache_settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(post, 'a', encoding='utf-8') as f:
+            f.write('\nFresh paragraph.\n')
+        stats = build(cache_settings)
+        assert stats.counters['fragment_cache_misses'] == 1
+        with open(cache_settings.output_dir + '2024-01-15-Example-Post.html', encoding='utf-8') as f:
+            assert 'Fresh paragraph.' in f.read()
+
+    def test_settings_change_keeps_conversions(self, cache_settings):
+        cache_settings.incremental = True
+        build(cache_settings)
+        cache_settings.site_name = 'Renamed'
+        stats = build(cache_settings)
+        assert stats.counters.get('posts_converted', 0) == 0
+        assert stats.counters['fragment_cache_hits'] == 3
@@ -0,0 +1,79 @@
+"""Tests for yakbarber.frontmatter."""
+
+import os
+import pytest
+
+from yakbarber.engine import _create_md_processor, build, post_index
+from yakbarber.frontmatter import parse_frontmatter, read_frontmatter, is_post, post_summary
+
+
+SOURCES = [
+    'Title: Plain\nDate: 2024-01-01 10:00\n\nBody text.\n',
+    '---\nTitle: Fenced\nDate: 2024-01-01\n---\nBody text.\n',
+    'Title: Multi\nTags: one\n    two\n\tthree\n\nBody.\n',
+    'Title:\nDate: 2024-01-01\n\nEmpty title.\n',
+    'Just a paragraph with no metadata.\n',
+    '\nTitle: After a blank line\n',
+    'Title: Windows\r\nDate: 2024-01-01\r\n\r\nBody.\r\n',
+    'Title: Stops here\n...\nDate: never\n',
+]
+
+
+class TestParseFrontmatter:
+    @pytest.mark.parametrize('source', SOURCES)
+    def test_matches_markdown_meta(self, source):
+        md = _create_md_processor()
+        md.convert(source)
+        assert parse_frontmatter(source.splitlines(keepends=True)) == md.Meta
+
+    def test_matches_fixture_posts(self, fixtures_dir):
+        content_dir = os.path.join(fixtures_dir, 'content')
+        md = _create_md_processor()
+        for name in os.listdir(content_dir):
+            path = os.path.join(content_dir, name)
+            if not os.path.isfile(path):
+                continue
+            md.reset()
+            with open(path, encoding='utf-8') as f:
+                md.convert(f.read())
+            assert read_frontmatter(path) == md.Meta
+
+    def test_stops_reading_at_header_end(self):
+        def lines():
+            yield 'Title: Lazy\n'
+            yield '\n'
+            raise AssertionError('read past the header')
+        assert parse_frontmatter(lines()) == {'title': ['Lazy']}
+
+
+class TestPostSummary:
+    def test_requires_title(self):
+        assert not is_post({})
+        assert not is_post({'title': ['']})
+        assert not is_post({'title': ['"Quoted"']})
+        assert post_summary({'date': ['2024-01-01']}) is None
+
+    def test_fields(self):
+        summary = post_summary({
+            'title': ['A Link, Post!'], 'date': ['2024-02-20 14:30:00'], 'link': ['https://example.org/'],
+        })
+        assert summary == {
+            'title': 'A Link, Post!',
+            'date': '2024-02-20 14:30:00',
+            'slug': '2024-02-20-A-Link-Post',
+            'link': 'https://example.org/',
+            'image': None,
+        }
+
+
+class TestPostIndex:
+    def test_newest_first(self, test_settings):
+        index = post_index(test_settings)
+        assert [s['source'] for s in index] == [
+            '2024-03-10-Post-With-Image.md', '2024-02-20-Link-Post.md', '2024-01-15-Example-Post.md',
+        ]
+
+    def test_slugs_match_built_pages(self, test_settings):
+        build(test_settings)
+        for summary in post_index(test_settings):
+            assert os.path.exists(os.path.join(test_settings.output_dir, summary['slug'] + '.html'))
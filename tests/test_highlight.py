@@ -0,0 +1,73 @@
+"""Tests for yakbarber.highlight."""
+
+import os
+import pytest
+
+pytest.importorskip("pygments")
+
+from yakbarber import highlight
+from yakbarber.engine import _create_md_processor, build
+from yakbarber.fingerprint import StaticAssets
+
+SOURCE = '''Title: Code
+
+```python
+if a < b:
+    pass
+```
+
+```
+plain <text>
+```
+'''
+
+
+@pytest.fixture
+def highlight_settings(writable_settings):
+    writable_settings.highlight_code = True
+    return writable_settings
+
+
+class TestHighlightBlock:
+    def test_highlights_known_language(self):
+        html = highlight.highlight_block('python', 'if a < b:\n    pass\n')
+        assert html.startswith('<div class="highlight"><pre>')
+        assert '<span class="k">if</span>' in html
+        assert '&lt;' in html
+
+    def test_unknown_language(self):
+        assert highlight.highlight_block('no-such-language', 'x') is None
+
+    def test_results_are_cached(self, monkeypatch):
+        first = highlight.highlight_block('python', 'cached = 1\n')
+        monkeypatch.setattr(highlight, '_import_pygments', None)
+        assert highlight.highlight_block('python', 'cached = 1\n') is first
+
+    def test_css_uses_style(self):
+        assert '.highlight .k' in highlight.highlight_css('solarized-dark')
+
+
+class TestMarkdownProcessor:
+    def test_fenced_blocks_are_highlighted(self, highlight_settings):
+        html = _create_md_processor(highlight_settings).convert(SOURCE)
+        assert '<div class="highlight">' in html
+        assert '<pre><code>plain &lt;text&gt;\n</code></pre>' in html
+
+    def test_disabled_by_default(self, test_settings):
+        html = _create_md_processor(test_settings).convert(SOURCE)
+        assert 'highlight' not in html
+        assert '<pre>' not in html
+
+
+class TestHighlightedBuild:
+    def test_publishes_stylesheet(self, highlight_settings):
+        with open(os.path.join(highlight_settings.content_dir, '2024-04-01-Code.md'), 'w', encoding='utf-8') as f:
+            f.write(SOURCE.replace('Title: Code', 'Title: Code\nDate: 2024-04-01 10:00:00'))
+        highlight_settings.jobs = 2
+        build(highlight_settings)
+        with open(os.path.join(highlight_settings.output_dir, '2024-04-01-Code.html'), encoding='utf-8') as f:
+            assert '<div class="highlight">' in f.read()
+        with open(os.path.join(highlight_settings.output_dir, 'pygments.css'), encoding='utf-8') as f:
+            assert f.read() == highlight.highlight_css('solarized-dark')
+        assets = StaticAssets(highlight_settings)
+        assert assets.urls['pygments_css'] == 'https://example.com/pygments.css'
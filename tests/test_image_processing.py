@@ -3,6 +3,7 @@
 import os
 import pytest
 
+from yakbarber.assets import ImagePipeline
 from yakbarber.engine import process_images, process_frontmatter_image
 from yakbarber.settings import SiteSettings
 
@@ -12,6 +13,7 @@ def image_settings(tmp_path):
     settings = SiteSettings(
         web_root="https://example.com/",
         output_dir=str(tmp_path / "output") + "/",
+        cache_dir=str(tmp_path / "cache") + "/",
     )
     os.makedirs(settings.output_dir, exist_ok=True)
     return settings
@@ -91,3 +93,68 @@ class TestProcessFrontmatterImage:
         process_frontmatter_image("photo.jpg", "2024-01-01-Test", source_with_image, image_settings)
         expected = os.path.join(image_settings.output_dir, "images", "2024-01-01-Test", "photo.jpg")
         assert os.path.exists(expected)
+
+
+class TestImagePipeline:
+    def test_unchanged_image_is_not_republished(self, image_settings, source_with_image):
+        source = os.path.join(source_with_image, "photo.jpg")
+        dest = os.path.join(image_settings.output_dir, "images", "a", "photo.jpg")
+        pipeline = ImagePipeline(image_settings)
+        assert pipeline.publish(source, dest) is True
+        pipeline.save()
+        pipeline = ImagePipeline(image_settings)
+        assert pipeline.publish(source, dest) is False
+        assert pipeline.unchanged == 1
+
+    def test_deleted_output_is_restored(self, image_settings, source_with_image):
+        source = os.path.join(source_with_image, "photo.jpg")
+        dest = os.path.join(image_settings.output_dir, "images", "a", "photo.jpg")
+        pipeline = ImagePipeline(image_settings)
+        pipeline.publish(source, dest)
+        os.remove(dest)
+        assert pipeline.publish(source, dest) is True
+        assert os.path.exists(dest)
+
+    def test_source_is_never_hardlinked(self, image_settings, source_with_image):
+        source = os.path.join(source_with_image, "photo.jpg")
+        dest = os.path.join(image_settings.output_dir, "images", "a", "photo.jpg")
+        ImagePipeline(image_settings).publish(source, dest)
+        assert os.stat(source).st_nlink == 1
+        assert not os.path.samefile(source, dest)
+
+    def test_changed_image_is_republished(self, image_settings, source_with_image):
+        source = os.path.join(source_with_image, "photo.jpg")
+        dest = os.path.join(image_settings.output_dir, "images", "a", "photo.jpg")
+        pipeline = ImagePipeline(image_settings)
+        pipeline.publish(source, dest)
+        os.remove(source)
+        with open(source, "wb") as f:
+            f.write(b"new-image-data")
+        assert pipeline.publish(source, dest) is True
+        with open(dest, "rb") as f:
+            assert f.read() == b"new-image-data"
+
+    def test_duplicate_images_share_one_copy(self, image_settings, source_with_image):
+        source = os.path.join(source_with_image, "photo.jpg")
+        first = os.path.join(image_settings.output_dir, "images", "a", "photo.jpg")
+        second = os.path.join(image_settings.output_dir, "images", "b", "photo.jpg")
+        pipeline = ImagePipeline(image_settings)
+        pipeline.publish(source, first)
+        pipeline.publish(source, second)
+        assert os.path.samefile(first, second)
+
+    def test_copy_mode(self, image_settings, source_with_image):
+        image_settings.image_links = False
+        source = os.path.join(source_with_image, "photo.jpg")
+        dest = os.path.join(image_settings.output_dir, "images", "a", "photo.jpg")
+        ImagePipeline(image_settings).publish(source, dest)
+        assert not os.path.samefile(source, dest)
+        with open(dest, "rb") as f:
+            assert f.read() == b"\xff\xd8\xff\xe0fake-jpeg-data"
+
+    def test_process_images_shares_pipeline(self, image_settings, source_with_image):
+        pipeline = ImagePipeline(image_settings)
+        content = '<img src="photo.jpg"><img src="photo.jpg">'
+        process_images(content, "slug", source_with_image, image_settings, pipeline)
+        assert pipeline.published == 1
+        assert pipeline.unchanged == 1
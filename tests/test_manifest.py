@@ -0,0 +1,196 @@
+"""Tests for yakbarber.manifest and incremental builds."""
+
+import os
+import pytest
+
+from yakbarber.engine import build
+from yakbarber.manifest import (
+    BuildManifest,
+    MANIFEST_NAME,
+    file_hash,
+    data_hash,
+    settings_fingerprint,
+)
+
+
+@pytest.fixture
+def incremental_settings(writable_settings):
+    writable_settings.incremental = True
+    return writable_settings
+
+
+class TestHashes:
+    def test_file_hash_changes_with_content(self, tmp_path):
+        f = tmp_path / 'a.md'
+        f.write_text('one')
+        first = file_hash(str(f))
+        f.write_text('two')
+        assert file_hash(str(f)) != first
+
+    def test_data_hash_ignores_key_order(self):
+        assert data_hash({'a': 1, 'b': 2}) == data_hash({'b': 2, 'a': 1})
+
+    def test_fingerprint_ignores_build_options(self, test_settings):
+        before = settings_fingerprint(test_settings)
+        test_settings.incremental = not test_settings.incremental
+        assert settings_fingerprint(test_settings) == before
+        test_settings.site_name = 'Renamed'
+        assert settings_fingerprint(test_settings) != before
+
+
+class TestBuildManifest:
+    def test_load_missing_is_empty(self, test_settings):
+        manifest = BuildManifest.load(test_settings)
+        assert manifest.posts == {}
+        assert manifest.outputs == {}
+
+    def test_save_and_load_round_trip(self, test_settings):
+        manifest = BuildManifest.load(test_settings)
+        manifest.update_fingerprints(test_settings)
+        manifest.posts['a.md'] = {'hash': 'abc', 'post': None}
+        manifest.save()
+        loaded = BuildManifest.load(test_settings)
+        assert loaded.cached_post('a.md', 'abc') == {'hash': 'abc', 'post': None}
+        assert loaded.cached_post('a.md', 'def') is None
+
+    def test_settings_change_invalidates(self, test_settings):
+        manifest = BuildManifest.load(test_settings)
+        manifest.update_fingerprints(test_settings)
+        manifest.posts['a.md'] = {'hash': 'abc', 'post': None}
+        test_settings.site_name = 'Renamed'
+        manifest.update_fingerprints(test_settings)
+        assert manifest.posts == {}
+
+
+class TestIncrementalBuild:
+    def test_writes_manifest(self, incremental_settings):
+        build(incremental_settings)
+        assert os.path.exists(os.path.join(incremental_settings.cache_dir, MANIFEST_NAME))
+
+    def test_caches_stay_out_of_output(self, incremental_settings):
+        incremental_settings.search_enabled = True
+        incremental_settings.fragment_cache = True
+        incremental_settings.gzip_output = True
+        build(incremental_settings)
+        build(incremental_settings)
+        assert not [n for n in os.listdir(incremental_settings.output_dir) if n.startswith('.')]
+        assert sorted(os.listdir(incremental_settings.cache_dir)) == [
+            'compress.json', 'fragments.sqlite', 'manifest.json', 'search',
+        ]
+
+    def test_unchanged_posts_are_not_rewritten(self, incremental_settings):
+        build(incremental_settings)
+        post_file = os.path.join(incremental_settings.output_dir, '2024-01-15-Example-Post.html')
+        feed_file = os.path.join(incremental_settings.output_dir, 'feed.xml')
+        os.utime(post_file, (0, 0))
+        os.utime(feed_file, (0, 0))
+        build(incremental_settings)
+        assert os.path.getmtime(post_file) == 0
+        assert os.path.getmtime(feed_file) == 0
+
+    def test_changed_post_is_rerendered(self, incremental_settings):
+        build(incremental_settings)
+        source = os.path.join(incremental_settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write('\nA freshly added sentence.\n')
+        build(incremental_settings)
+        post_file = os.path.join(incremental_settings.output_dir, '2024-01-15-Example-Post.html')
+        with open(post_file, 'r', encoding='utf-8') as f:
+            assert 'A freshly added sentence.' in f.read()
+        with open(os.path.join(incremental_settings.output_dir, 'feed.xml'), 'r', encoding='utf-8') as f:
+            assert 'A freshly added sentence.' in f.read()
+
+    def test_resource_change_keeps_rendered_pages(self, incremental_settings):
+        stylesheet = os.path.join(incremental_settings.template_dir, 'main.css')
+        with open(stylesheet, 'w', encoding='utf-8') as f:
+            f.write('body { color: red; }\n')
+        build(incremental_settings)
+        with open(stylesheet, 'w', encoding='utf-8') as f:
+            f.write('body { color: blue; }\n')
+        assert build(incremental_settings).counters.get('posts_rendered', 0) == 0
+        incremental_settings.fingerprint_assets = True
+        build(incremental_settings)
+        with open(stylesheet, 'w', encoding='utf-8') as f:
+            f.write('body { color: green; }\n')
+        assert build(incremental_settings).counters['posts_rendered'] == 3
+
+    def test_unchanged_sources_are_not_rehashed(self, incremental_settings):
+        build(incremental_settings)
+        stats = build(incremental_settings)
+        assert stats.counters.get('posts_hashed', 0) == 0
+        source = os.path.join(incremental_settings.content_dir, '2024-01-15-Example-Post.md')
+        os.utime(source, ns=(0, 0))
+        stats = build(incremental_settings)
+        assert stats.counters['posts_hashed'] == 1
+        assert stats.counters.get('posts_converted', 0) == 0
+
+    def test_sources_without_title_are_not_converted(self, incremental_settings):
+        stats = build(incremental_settings)
+        assert stats.counters['posts_converted'] == 3
+        manifest = BuildManifest.load(incremental_settings)
+        assert manifest.posts['about.markdown']['post'] is None
+
+    def test_sharded_content(self, incremental_settings):
+        content_dir = incremental_settings.content_dir
+        os.makedirs(os.path.join(content_dir, '2024', '01'))
+        os.replace(os.path.join(content_dir, '2024-01-15-Example-Post.md'),
+                   os.path.join(content_dir, '2024', '01', '2024-01-15-Example-Post.md'))
+        build(incremental_settings)
+        post_file = os.path.join(incremental_settings.output_dir, '2024-01-15-Example-Post.html')
+        assert os.path.exists(post_file)
+        manifest = BuildManifest.load(incremental_settings)
+        assert os.path.join('2024', '01', '2024-01-15-Example-Post.md') in manifest.posts
+
+    def test_post_index_only_changes_with_listed_fields(self, incremental_settings):
+        build(incremental_settings)
+        index_file = os.path.join(incremental_settings.output_dir, 'posts.json')
+        os.utime(index_file, (0, 0))
+        source = os.path.join(incremental_settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write('\nA body-only edit.\n')
+        build(incremental_settings)
+        assert os.path.getmtime(index_file) == 0
+        with open(source, encoding='utf-8') as f:
+            text = f.read()
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(text.replace('Category: text', 'Category: notes'))
+        build(incremental_settings)
+        assert os.path.getmtime(index_file) != 0
+
+    def test_deleted_output_is_regenerated(self, incremental_settings):
+        build(incremental_settings)
+        post_file = os.path.join(incremental_settings.output_dir, '2024-01-15-Example-Post.html')
+        os.remove(post_file)
+        build(incremental_settings)
+        assert os.path.exists(post_file)
+
+    def test_retitled_post_page_is_removed(self, incremental_settings):
+        build(incremental_settings)
+        source = os.path.join(incremental_settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(source, encoding='utf-8') as f:
+            text = f.read()
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(text.replace('Title: Example Post', 'Title: Renamed Post'))
+        build(incremental_settings)
+        output = os.listdir(incremental_settings.output_dir)
+        assert '2024-01-15-Renamed-Post.html' in output
+        assert '2024-01-15-Example-Post.html' not in output
+
+    def test_deleted_post_page_is_removed(self, incremental_settings):
+        build(incremental_settings)
+        os.remove(os.path.join(incremental_settings.content_dir, '2024-01-15-Example-Post.md'))
+        build(incremental_settings)
+        assert not os.path.exists(
+            os.path.join(incremental_settings.output_dir, '2024-01-15-Example-Post.html'))
+
+    def test_matches_full_build(self, incremental_settings, tmp_path):
+        build(incremental_settings)
+        build(incremental_settings)
+        incremental_settings.incremental = False
+        incremental_settings.output_dir = str(tmp_path / 'full') + '/'
+        build(incremental_settings)
+        for name in ('index.html', 'index2.html', '2024-02-20-A-Link-Post.html'):
+            with open(os.path.join(tmp_path, 'output', name), encoding='utf-8') as f:
+                incremental = f.read()
+            with open(os.path.join(tmp_path, 'full', name), encoding='utf-8') as f:
+                assert f.read() == incremental
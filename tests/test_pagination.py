@@ -0,0 +1,60 @@
+"""Tests for yakbarber.pagination."""
+
+import pytest
+
+from yakbarber.pagination import paginate
+
+
+def _layout(pages):
+    return [(p.file_name, p.posts, p.previous, p.next) for p in pages]
+
+
+class TestPaginate:
+    def test_empty(self):
+        assert paginate([], 2) == []
+        assert paginate([], 2, 'stable') == []
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match='stabel'):
+            paginate([1], 2, 'stabel')
+
+    def test_newest_links(self):
+        posts = list(range(7, 0, -1))
+        assert _layout(paginate(posts, 3)) == [
+            ('index.html', [7, 6, 5], 'index2.html', None),
+            ('index2.html', [4, 3, 2], 'index3.html', 'index.html'),
+            ('index3.html', [1], None, 'index2.html'),
+        ]
+
+    def test_single_page_has_no_links(self):
+        assert _layout(paginate([2, 1], 2)) == [('index.html', [2, 1], None, None)]
+        assert _layout(paginate([2, 1], 2, 'stable')) == [('index.html', [2, 1], None, None)]
+
+    def test_stable_buckets_count_from_oldest(self):
+        posts = list(range(8, 0, -1))
+        assert _layout(paginate(posts, 3, 'stable')) == [
+            ('index.html', [8, 7, 6, 5, 4], 'page1.html', None),
+            ('page1.html', [3, 2, 1], None, 'index.html'),
+        ]
+        posts = list(range(9, 0, -1))
+        assert _layout(paginate(posts, 3, 'stable')) == [
+            ('index.html', [9, 8, 7], 'page2.html', None),
+            ('page2.html', [6, 5, 4], 'page1.html', 'index.html'),
+            ('page1.html', [3, 2, 1], None, 'page2.html'),
+        ]
+
+    def test_stable_pages_survive_new_posts(self):
+        def changed(before, after):
+            old = {p.file_name: _layout([p]) for p in paginate(list(range(before, 0, -1)), 3, 'stable')}
+            return [p.file_name for p in paginate(list(range(after, 0, -1)), 3, 'stable')
+                    if old.get(p.file_name) != _layout([p])]
+
+        assert changed(21, 22) == ['index.html']
+        # Filling the newest bucket moves the bucket below it out of index.html.
+        assert changed(20, 21) == ['index.html', 'page6.html', 'page5.html']
+
+    def test_stable_covers_every_post_once(self):
+        for total in range(1, 20):
+            pages = paginate(list(range(total, 0, -1)), 3, 'stable')
+            assert [post for p in pages for post in p.posts] == list(range(total, 0, -1))
+            assert all(len(p.posts) == 3 for p in pages[1:])
@@ -0,0 +1,73 @@
+"""Tests for yakbarber.post."""
+
+import datetime
+import pickle
+
+from yakbarber.post import Post, parse_date, display_title
+from yakbarber.utils import rfc3339_convert
+
+
+def make_post(**meta):
+    meta.setdefault('title', 'Hello, World!')
+    meta.setdefault('date', '2024-01-15 10:00:00')
+    return Post({k: [v] for k, v in meta.items()}, '<p>Body</p>')
+
+
+class TestParseDate:
+    def test_formats(self):
+        assert parse_date('2024-01-15 10:00:00') == datetime.datetime(2024, 1, 15, 10, 0, 0)
+        assert parse_date('2024-01-15 10:00') == datetime.datetime(2024, 1, 15, 10, 0)
+        assert parse_date('2024-01-15') == datetime.datetime(2024, 1, 15)
+
+    def test_unknown_format(self):
+        assert parse_date('January 15th') is None
+
+
+class TestPost:
+    def test_derived_fields(self):
+        post = make_post(link='https://example.org/')
+        assert post.slug == '2024-01-15-Hello-World'
+        assert post.url('https://example.com/') == 'https://example.com/2024-01-15-Hello-World.html'
+        assert post.datetime == datetime.datetime(2024, 1, 15, 10, 0, 0)
+        assert post.link == 'https://example.org/'
+        assert post.image is None
+
+    def test_updated_matches_rfc3339_convert(self):
+        assert make_post().updated == rfc3339_convert('2024-01-15 10:00:00')
+        assert make_post(date='someday').updated is None
+
+    def test_display_title(self):
+        assert make_post(title='It\'s *here*').display_title == display_title('It\'s *here*')
+        assert display_title('It\'s *here*') == 'It’s here'
+
+    def test_context(self, test_settings):
+        context = make_post(category='Notes').context(test_settings)
+        assert context['category'] == 'Notes'
+        assert context['content'] == '<p>Body</p>'
+        assert context['image'] == test_settings.ogp_default_image
+        assert context['postURL'] == test_settings.web_root + '2024-01-15-Hello-World.html'
+        assert context['atomDate'] == '2024-01-15T17:53:00Z'
+
+    def test_context_keeps_post_image(self, test_settings):
+        context = make_post(image='https://example.com/a.jpg').context(test_settings)
+        assert context['image'] == 'https://example.com/a.jpg'
+
+    def test_archive_links(self, test_settings):
+        post = Post({'title': ['Tagged'], 'date': ['2024-01-15'], 'category': ['Static Sites'],
+                     'tags': ['python, web', 'markdown']})
+        assert post.tags == ['python', 'web', 'markdown']
+        context = post.context(test_settings)
+        assert context['category-page'] == 'https://example.com/category/static-sites/index.html'
+        assert [t['tag-page'] for t in context['tag-pages']][-1] == 'https://example.com/tag/markdown/index.html'
+        assert context['tagged'] is True
+        test_settings.archive_categories = False
+        test_settings.archive_tags = False
+        context = post.context(test_settings)
+        assert 'category-page' not in context
+        assert 'tag-pages' not in context
+
+    def test_pickles(self):
+        post = make_post()
+        copy = pickle.loads(pickle.dumps(post))
+        assert copy.slug == post.slug
+        assert copy.meta == post.meta
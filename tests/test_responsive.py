@@ -0,0 +1,65 @@
+"""Tests for responsive image derivatives."""
+
+import os
+import pytest
+
+from yakbarber.assets import ImagePipeline
+from yakbarber.engine import process_images
+from yakbarber.settings import SiteSettings
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def responsive_settings(tmp_path):
+    settings = SiteSettings(
+        web_root="https://example.com/",
+        output_dir=str(tmp_path / "output") + "/",
+        cache_dir=str(tmp_path / "cache") + "/",
+        image_widths=[100, 200, 800],
+        image_format="jpeg",
+    )
+    os.makedirs(settings.output_dir, exist_ok=True)
+    return settings
+
+
+@pytest.fixture
+def photo_dir(tmp_path):
+    source_dir = tmp_path / "drafts"
+    source_dir.mkdir()
+    Image.new("RGB", (400, 300), "teal").save(source_dir / "photo.jpg")
+    return str(source_dir)
+
+
+class TestResponsiveImages:
+    def test_adds_srcset_and_writes_derivatives(self, responsive_settings, photo_dir):
+        content = '<img src="photo.jpg" alt="test">'
+        result = process_images(content, "slug", photo_dir, responsive_settings)
+        assert 'srcset="' in result
+        assert ' 100w, ' in result
+        assert ' 200w, ' in result
+        assert '800w' not in result
+        assert 'https://example.com/images/slug/photo.jpg 400w"' in result
+        images_dir = os.path.join(responsive_settings.output_dir, "images", "slug")
+        derivatives = sorted(f for f in os.listdir(images_dir) if f != "photo.jpg")
+        assert len(derivatives) == 2
+        with Image.open(os.path.join(images_dir, derivatives[0])) as img:
+            assert img.size == (100, 75)
+
+    def test_does_not_reencode_unchanged_images(self, responsive_settings, photo_dir):
+        content = '<img src="photo.jpg">'
+        process_images(content, "slug", photo_dir, responsive_settings)
+        pipeline = ImagePipeline(responsive_settings)
+        process_images(content, "slug", photo_dir, responsive_settings, pipeline)
+        assert pipeline.derivatives.pending == []
+        assert pipeline.derivatives.run() == 0
+
+    def test_keeps_existing_srcset(self, responsive_settings, photo_dir):
+        content = '<img src="photo.jpg" srcset="https://cdn.example.com/p.jpg 2x">'
+        result = process_images(content, "slug", photo_dir, responsive_settings)
+        assert result.count('srcset=') == 1
+
+    def test_disabled_without_widths(self, responsive_settings, photo_dir):
+        responsive_settings.image_widths = []
+        result = process_images('<img src="photo.jpg">', "slug", photo_dir, responsive_settings)
+        assert 'srcset' not in result
@@ -0,0 +1,188 @@
+"""Tests for yakbarber.search."""
+
+import os
+import json
+import shutil
+import pytest
+
+from yakbarber.engine import build
+from yakbarber.search import (
+    tokenize,
+    shard_of,
+    encode_postings,
+    decode_postings,
+    post_terms,
+)
+
+
+@pytest.fixture
+def search_settings(writable_settings):
+    writable_settings.incremental = True
+    writable_settings.search_enabled = True
+    writable_settings.search_shards = 8
+    return writable_settings
+
+
+def lookup(settings, term):
+    """Return the URLs of posts containing term, via the published index."""
+    search_dir = os.path.join(settings.output_dir, 'search')
+    with open(os.path.join(search_dir, 'docs.json'), encoding='utf-8') as f:
+        index = json.load(f)
+    with open(os.path.join(search_dir, f"shard-{shard_of(term, index['shards']):03d}.json"), encoding='utf-8') as f:
+        shard = json.load(f)
+    return sorted(index['docs'][doc][1] for doc, _ in decode_postings(shard.get(term, '')))
+
+
+def index_contents(search_dir):
+    """Return the index in search_dir as {term: sorted (url, frequency) pairs} and its URLs."""
+    with open(os.path.join(search_dir, 'docs.json'), encoding='utf-8') as f:
+        docs = json.load(f)['docs']
+    contents = {}
+    for name in os.listdir(search_dir):
+        if name.startswith('shard-'):
+            with open(os.path.join(search_dir, name), encoding='utf-8') as f:
+                for term, data in json.load(f).items():
+                    contents[term] = sorted((docs[doc][1], tf) for doc, tf in decode_postings(data))
+    return contents, sorted(doc[1] for doc in docs if doc)
+
+
+def add_posts(settings, count, year=2023):
+    for n in range(count):
+        with open(os.path.join(settings.content_dir, f'extra-{n}.md'), 'w', encoding='utf-8') as f:
+            f.write(f'Title: Extra {n}\nDate: {year}-06-{n + 1:02d} 10:00:00\n\nFiller words number{n}.\n')
+
+
+class TestEncoding:
+    def test_tokenize(self):
+        assert tokenize('The Quick, quick <b>fox</b> in 2024!') == ['quick', 'quick', 'fox', '2024']
+
+    def test_shard_of_is_fnv1a(self):
+        assert shard_of('a', 2 ** 32) == 0xe40c292c
+        assert 0 <= shard_of('example', 64) < 64
+
+    def test_postings_round_trip(self):
+        postings = [(0, 1), (3, 200), (1000, 7), (100000, 1)]
+        assert decode_postings(encode_postings(postings)) == postings
+
+    def test_post_terms_weights_title(self):
+        terms = post_terms({'title': 'Fox', 'content': '<p>fox and hound</p><script>var x;</script>'})
+        assert terms == {'fox': 6, 'hound': 1}
+
+
+class TestSearchIndex:
+    def test_disabled_by_default(self, test_settings):
+        build(test_settings)
+        assert not os.path.exists(os.path.join(test_settings.output_dir, 'search'))
+
+    def test_build_writes_index(self, search_settings):
+        build(search_settings)
+        search_dir = os.path.join(search_settings.output_dir, 'search')
+        assert sorted(os.listdir(search_dir)) == ['docs.json'] + [f'shard-{n:03d}.json' for n in range(8)]
+        assert lookup(search_settings, 'example') == ['https://example.com/2024-01-15-Example-Post.html']
+
+    def test_edit_updates_only_affected_shards(self, search_settings):
+        build(search_settings)
+        search_dir = os.path.join(search_settings.output_dir, 'search')
+        for name in os.listdir(search_dir):
+            os.utime(os.path.join(search_dir, name), (0, 0))
+        source = os.path.join(search_settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write('\nZanzibar.\n')
+        stats = build(search_settings)
+        assert stats.counters['search_posts_indexed'] == 1
+        assert lookup(search_settings, 'zanzibar') == ['https://example.com/2024-01-15-Example-Post.html']
+        assert lookup(search_settings, 'example') == ['https://example.com/2024-01-15-Example-Post.html']
+        untouched = [n for n in os.listdir(search_dir) if os.path.getmtime(os.path.join(search_dir, n)) == 0]
+        assert untouched
+
+    def test_deleted_post_is_removed(self, search_settings):
+        build(search_settings)
+        os.remove(os.path.join(search_settings.content_dir, '2024-01-15-Example-Post.md'))
+        build(search_settings)
+        assert lookup(search_settings, 'example') == []
+
+    def test_incremental_matches_rebuild(self, search_settings, tmp_path):
+        build(search_settings)
+        source = os.path.join(search_settings.content_dir, '2024-02-20-Link-Post.md')
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write('\nAnother paragraph.\n')
+        build(search_settings)
+        incremental_dir = os.path.join(search_settings.output_dir, 'search')
+        search_settings.incremental = False
+        search_settings.output_dir = str(tmp_path / 'full') + '/'
+        build(search_settings)
+        full_dir = os.path.join(search_settings.output_dir, 'search')
+        for name in os.listdir(full_dir):
+            with open(os.path.join(full_dir, name), encoding='utf-8') as f:
+                expected = f.read()
+            with open(os.path.join(incremental_dir, name), encoding='utf-8') as f:
+                assert f.read() == expected
+
+    def test_incremental_after_delete_and_insert_answers_like_rebuild(self, search_settings, tmp_path):
+        add_posts(search_settings, 6)
+        build(search_settings)
+        os.remove(os.path.join(search_settings.content_dir, 'extra-0.md'))
+        with open(os.path.join(search_settings.content_dir, 'backdated.md'), 'w', encoding='utf-8') as f:
+            f.write('Title: Backdated\nDate: 2020-01-01 10:00:00\n\nOld zebra news.\n')
+        build(search_settings)
+        incremental_dir = os.path.join(search_settings.output_dir, 'search')
+        with open(os.path.join(incremental_dir, 'docs.json'), encoding='utf-8') as f:
+            # The deleted post's id stays unused; the back-dated post gets a new one.
+            docs = json.load(f)['docs']
+        assert docs.count(None) == 1
+        assert docs[-1][0] == 'Backdated'
+        search_settings.incremental = False
+        search_settings.output_dir = str(tmp_path / 'full') + '/'
+        build(search_settings)
+        full_dir = os.path.join(search_settings.output_dir, 'search')
+        assert index_contents(incremental_dir) == index_contents(full_dir)
+
+    def test_unused_ids_are_compacted(self, search_settings, tmp_path):
+        add_posts(search_settings, 5)
+        build(search_settings)
+        for n in range(3):
+            os.remove(os.path.join(search_settings.content_dir, f'extra-{n}.md'))
+        build(search_settings)
+        incremental_dir = os.path.join(search_settings.output_dir, 'search')
+        search_settings.incremental = False
+        search_settings.output_dir = str(tmp_path / 'full') + '/'
+        build(search_settings)
+        full_dir = os.path.join(search_settings.output_dir, 'search')
+        for name in os.listdir(full_dir):
+            with open(os.path.join(full_dir, name), encoding='utf-8') as f:
+                expected = f.read()
+            with open(os.path.join(incremental_dir, name), encoding='utf-8') as f:
+                assert f.read() == expected
+
+    def test_wiped_output_is_republished(self, search_settings):
+        build(search_settings)
+        search_dir = os.path.join(search_settings.output_dir, 'search')
+        expected = {}
+        for name in os.listdir(search_dir):
+            with open(os.path.join(search_dir, name), encoding='utf-8') as f:
+                expected[name] = f.read()
+        shutil.rmtree(search_settings.output_dir)
+        build(search_settings)
+        assert sorted(os.listdir(search_dir)) == sorted(expected)
+        for name, data in expected.items():
+            with open(os.path.join(search_dir, name), encoding='utf-8') as f:
+                assert f.read() == data
+
+    def test_spilling_gives_identical_index(self, search_settings, tmp_path):
+        build(search_settings)
+        search_settings.incremental = False
+        search_settings.search_buffer = 1
+        search_settings.output_dir = str(tmp_path / 'spilled') + '/'
+        build(search_settings)
+        for name in os.listdir(os.path.join(tmp_path, 'output', 'search')):
+            with open(os.path.join(tmp_path, 'output', 'search', name), encoding='utf-8') as f:
+                expected = f.read()
+            with open(os.path.join(tmp_path, 'spilled', 'search', name), encoding='utf-8') as f:
+                assert f.read() == expected
+
+    def test_fewer_shards_removes_extra_files(self, search_settings):
+        build(search_settings)
+        search_settings.search_shards = 2
+        build(search_settings)
+        names = sorted(os.listdir(os.path.join(search_settings.output_dir, 'search')))
+        assert names == ['docs.json', 'shard-000.json', 'shard-001.json']
@@ -0,0 +1,123 @@
+"""Tests for yakbarber.server."""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import pytest
+
+from yakbarber import server as server_module
+from yakbarber.stats import BuildStats
+from yakbarber.server import SiteDaemon, make_server
+
+
+@pytest.fixture
+def daemon(writable_settings):
+    site = SiteDaemon(writable_settings)
+    site.rebuild()
+    return site
+
+
+@pytest.fixture
+def server(daemon):
+    httpd = make_server(daemon, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestSiteDaemon:
+    def test_rebuild_keeps_manifest_in_memory(self, daemon):
+        assert daemon.builds == 1
+        assert daemon.status()['posts'] == 3
+        assert not os.path.exists(daemon.manifest.path)
+        daemon.save()
+        assert os.path.exists(daemon.manifest.path)
+
+    def test_second_rebuild_writes_nothing(self, daemon):
+        stats = daemon.rebuild()
+        assert stats.written == 0
+
+    def test_status_during_rebuild_reports_last_build(self, daemon, monkeypatch):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_build(settings, changes, manifest):
+            manifest.posts['new.md'] = {'post': ['meta', 'html']}
+            started.set()
+            release.wait(5)
+            return BuildStats()
+
+        monkeypatch.setattr(server_module, 'build', slow_build)
+        thread = threading.Thread(target=daemon.rebuild)
+        thread.start()
+        assert started.wait(5)
+        status = daemon.status()
+        release.set()
+        thread.join()
+        assert status['builds'] == 1
+        assert status['posts'] == 3
+        assert daemon.status()['posts'] == 4
+
+
+class TestPreviewServer:
+    def test_serves_output(self, server):
+        with urllib.request.urlopen(server + '/index.html') as response:
+            assert b'Test Blog' in response.read()
+
+    def test_fingerprinted_assets_are_immutable(self, server, daemon):
+        with open(os.path.join(daemon.settings.output_dir, 'main.0123456789.css'), 'w') as f:
+            f.write('body{}')
+        with urllib.request.urlopen(server + '/main.0123456789.css') as response:
+            assert 'immutable' in response.headers['Cache-Control']
+        with urllib.request.urlopen(server + '/index.html') as response:
+            assert response.headers['Cache-Control'] is None
+
+    def test_status(self, server):
+        with urllib.request.urlopen(server + '/_yakbarber/status') as response:
+            status = json.loads(response.read())
+        assert status['builds'] == 1
+        assert status['posts'] == 3
+
+    def test_rebuild_paths(self, server, daemon):
+        post = os.path.join(daemon.settings.content_dir, '2024-01-15-Example-Post.md')
+        with open(post, 'a', encoding='utf-8') as f:
+            f.write('\nServed fresh.\n')
+        request = urllib.request.Request(
+            server + '/_yakbarber/rebuild',
+            data=json.dumps({'paths': [post]}).encode('utf-8'),
+            method='POST',
+        )
+        with urllib.request.urlopen(request) as response:
+            status = json.loads(response.read())
+        assert status['builds'] == 2
+        assert status['last_build']['written'] >= 1
+        with urllib.request.urlopen(server + '/2024-01-15-Example-Post.html') as response:
+            assert b'Served fresh.' in response.read()
+
+    def test_status_ignores_query(self, server):
+        with urllib.request.urlopen(server + '/_yakbarber/status?x=1') as response:
+            assert json.loads(response.read())['builds'] == 1
+
+    @pytest.mark.parametrize('body', [{'paths': [1]}, {'paths': 'post.md'}, {'paths': None}])
+    def test_rebuild_rejects_bad_paths(self, server, body):
+        request = urllib.request.Request(
+            server + '/_yakbarber/rebuild', data=json.dumps(body).encode('utf-8'), method='POST'
+        )
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request)
+        assert excinfo.value.code == 400
+
+    def test_rebuild_failure_is_reported(self, server, daemon, monkeypatch):
+        def broken_build(*args):
+            raise ValueError('bad template')
+
+        monkeypatch.setattr('yakbarber.server.build', broken_build)
+        request = urllib.request.Request(server + '/_yakbarber/rebuild', data=b'', method='POST')
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request)
+        assert excinfo.value.code == 500
+        assert 'bad template' in json.loads(excinfo.value.read())['error']
@@ -19,6 +19,7 @@ class TestLoadSettings:
         settings = load_settings(str(toml_file))
         assert settings.site_name == "Minimal"
         assert settings.posts_per_page == 10  # default
+        assert settings.pagination == "newest"  # default
         assert settings.typekit_id == ""  # default
         assert settings.content_dir == "content/"  # default
 
@@ -50,6 +51,43 @@ class TestLoadSettings:
         assert settings.twitter_handle == "@test"
         assert settings.fedi_handle == "@test@mastodon.social"
 
+    def test_build_section(self, tmp_path):
+        toml_file = tmp_path / "build.toml"
+        toml_file.write_text('[site]\nsite_name = "Test"\n[build]\nincremental = true\nfragment_cache = true\n')
+        settings = load_settings(str(toml_file))
+        assert settings.incremental is True
+        assert settings.fragment_cache is True
+        assert settings.fragment_cache_mb == 64
+        assert settings.cache_dir == ".yakbarber-cache/"
+
+    def test_output_section(self, tmp_path):
+        toml_file = tmp_path / "output.toml"
+        toml_file.write_text('[site]\nsite_name = "Test"\n[output]\nminify = true\ngzip = true\n')
+        settings = load_settings(str(toml_file))
+        assert settings.minify_output is True
+        assert settings.gzip_output is True
+        assert settings.brotli_output is False
+
+    def test_markdown_section(self, tmp_path):
+        toml_file = tmp_path / "markdown.toml"
+        toml_file.write_text('[site]\nsite_name = "Test"\n[markdown]\nhighlight = true\n')
+        settings = load_settings(str(toml_file))
+        assert settings.highlight_code is True
+        assert settings.highlight_style == "solarized-dark"
+
+    def test_archives_section(self, tmp_path):
+        toml_file = tmp_path / "archives.toml"
+        toml_file.write_text('[site]\nsite_name = "Test"\n[archives]\ntags = false\n')
+        settings = load_settings(str(toml_file))
+        assert settings.archive_categories is True
+        assert settings.archive_tags is False
+
+    def test_unknown_pagination_mode(self, tmp_path):
+        toml_file = tmp_path / "pagination.toml"
+        toml_file.write_text('[site]\nsite_name = "Test"\npagination = "stabel"\n')
+        with pytest.raises(ValueError, match="stabel"):
+            load_settings(str(toml_file))
+
 
 class TestSiteSettings:
     def test_dataclass_defaults(self):
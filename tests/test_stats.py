@@ -0,0 +1,71 @@
+"""Tests for yakbarber.stats and build reports."""
+
+import json
+import os
+
+from yakbarber.engine import build
+from yakbarber.stats import BuildStats
+
+PHASES = ('about_page', 'process_posts', 'render_post', 'paginated_index', 'feed', 'template_resources')
+
+
+class TestBuildStats:
+    def test_record_counts_bytes(self):
+        stats = BuildStats()
+        stats.record(True, 100)
+        stats.record(False, 50)
+        assert stats.written == 1
+        assert stats.unchanged == 1
+        assert stats.counters['bytes_written'] == 100
+
+    def test_phase_accumulates(self):
+        stats = BuildStats()
+        with stats.phase('feed'):
+            pass
+        with stats.phase('feed'):
+            pass
+        assert set(stats.phases) == {'feed'}
+        assert stats.phases['feed']['wall'] >= 0
+
+    def test_report_text(self):
+        stats = BuildStats()
+        with stats.phase('feed'):
+            stats.count('posts_rendered', 3)
+        stats.finish()
+        text = stats.report_text()
+        assert 'feed' in text
+        assert 'total' in text
+        assert 'posts_rendered' in text
+
+    def test_status_line(self):
+        stats = BuildStats()
+        stats.record(True, 10)
+        stats.finish()
+        assert stats.status_line().startswith('Build complete: 1 files changed, 0 unchanged in ')
+
+
+class TestBuildReport:
+    def test_build_times_every_phase(self, test_settings):
+        stats = build(test_settings)
+        assert set(PHASES) <= set(stats.phases)
+        assert stats.counters['posts_rendered'] == 3
+        assert stats.counters['bytes_written'] > 0
+        assert stats.wall > 0
+
+    def test_writes_json_report(self, test_settings, tmp_path):
+        test_settings.report_path = str(tmp_path / 'report.json')
+        build(test_settings)
+        with open(test_settings.report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        assert report['files']['written'] > 0
+        assert set(PHASES) <= set(report['phases'])
+
+    def test_incremental_cache_counters(self, test_settings, tmp_path):
+        test_settings.incremental = True
+        test_settings.output_dir = str(tmp_path / 'output') + '/'
+        build(test_settings)
+        stats = build(test_settings)
+        assert stats.counters['post_cache_hits'] == 4
+        assert stats.counters.get('post_cache_misses') == 0
+        assert stats.counters['output_cache_hits'] >= 3
+        assert os.path.exists(os.path.join(test_settings.output_dir, 'index.html'))
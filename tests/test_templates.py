@@ -0,0 +1,39 @@
+"""Tests for yakbarber.templates."""
+
+import os
+
+from yakbarber.templates import TemplateRegistry, get_registry
+
+
+class TestTemplateRegistry:
+    def test_renders_template(self, tmp_path):
+        (tmp_path / 'hello.html').write_text('Hello {{name}}!')
+        registry = TemplateRegistry(str(tmp_path))
+        assert registry.render('hello.html', {'name': 'Yak'}) == 'Hello Yak!'
+
+    def test_parses_once(self, tmp_path):
+        (tmp_path / 'hello.html').write_text('Hello {{name}}!')
+        registry = TemplateRegistry(str(tmp_path))
+        assert registry.get('hello.html') is registry.get('hello.html')
+
+    def test_refresh_reloads_changed_template(self, tmp_path):
+        template = tmp_path / 'hello.html'
+        template.write_text('Hello {{name}}!')
+        registry = TemplateRegistry(str(tmp_path))
+        registry.render('hello.html', {'name': 'Yak'})
+        template.write_text('Goodbye {{name}}!')
+        os.utime(template, ns=(0, 0))
+        # Without a refresh the parsed template stays cached.
+        assert registry.render('hello.html', {'name': 'Yak'}) == 'Hello Yak!'
+        registry.refresh()
+        assert registry.render('hello.html', {'name': 'Yak'}) == 'Goodbye Yak!'
+
+    def test_refresh_keeps_unchanged_template(self, tmp_path):
+        (tmp_path / 'hello.html').write_text('Hello {{name}}!')
+        registry = TemplateRegistry(str(tmp_path))
+        parsed = registry.get('hello.html')
+        registry.refresh()
+        assert registry.get('hello.html') is parsed
+
+    def test_get_registry_is_shared(self, tmp_path):
+        assert get_registry(str(tmp_path)) is get_registry(str(tmp_path))
@@ -1,5 +1,8 @@
 """Tests for yakbarber.utils."""
 
+import os
+import json
+
 from yakbarber.utils import (
     remove_punctuation,
     split_every,
@@ -7,6 +10,11 @@ from yakbarber.utils import (
     convert_http_to_https,
     extract_tags,
     strip_tags,
+    filter_html,
+    write_if_changed,
+    save_json,
+    copy_if_changed,
+    scan_files,
 )
 
 
@@ -99,3 +107,113 @@ class TestStripTags:
 
     def test_plain_text_unchanged(self):
         assert strip_tags('No tags here') == 'No tags here'
+
+
+class TestFilterHtml:
+    def test_removes_configured_tags(self):
+        html = '<p>Hello</p><script>alert("<p>x</p>")</script><iframe src="x"></iframe><p>World</p>'
+        result, _ = filter_html(html, ('script', 'iframe'))
+        assert result == '<p>Hello</p><p>World</p>'
+
+    def test_keeps_other_markup_verbatim(self):
+        html = '<p class="a">Caf&eacute; &amp; <br/><!-- note --><b>bold</b></p>'
+        result, _ = filter_html(html, ('script',))
+        assert result == html
+
+    def test_extracts_text(self):
+        _, text = filter_html('<p>Fish &amp; Chips <b>now</b></p><script>x()</script>', ('script',))
+        assert text == 'Fish & Chips now'
+
+    def test_nested_removed_tags(self):
+        html = '<object><object><p>inner</p></object><p>still inner</p></object><p>out</p>'
+        result, text = filter_html(html, ('object',))
+        assert result == '<p>out</p>'
+        assert text == 'out'
+
+    def test_bare_ampersands_pass_through(self):
+        html = '<p>AT&T and R&D,\nfish &amp chips &#39 &eacute;</p>'
+        result, text = filter_html(html)
+        assert result == html
+        assert text == "AT&T and R&D,\nfish & chips ' \u00e9"
+
+    def test_cdata_section_kept(self):
+        html = '<svg><![CDATA[a < b]]></svg><![if !IE]>x<![endif]>'
+        assert filter_html(html)[0] == html
+
+    def test_void_elements_drop_only_their_tag(self):
+        html = '<p>one</p><embed src=x><p>two <img src="a.png"> three</p><object><img></object><p>four</p>'
+        result, text = filter_html(html, ('embed', 'img', 'object'))
+        assert result == '<p>one</p><p>two  three</p><p>four</p>'
+        assert text == 'onetwo  threefour'
+
+    def test_plain_text_unchanged(self):
+        assert filter_html('No tags here') == ('No tags here', 'No tags here')
+
+
+class TestWriteIfChanged:
+    def test_writes_new_file(self, tmp_path):
+        path = tmp_path / 'page.html'
+        assert write_if_changed(str(path), 'caf\u00e9') is True
+        assert path.read_text(encoding='utf-8') == 'caf\u00e9'
+
+    def test_skips_identical_content(self, tmp_path):
+        path = tmp_path / 'page.html'
+        path.write_text('same')
+        os.utime(path, (0, 0))
+        assert write_if_changed(str(path), 'same') is False
+        assert os.path.getmtime(path) == 0
+
+    def test_replaces_changed_content(self, tmp_path):
+        path = tmp_path / 'page.html'
+        path.write_text('old!')
+        assert write_if_changed(str(path), 'new!') is True
+        assert path.read_text() == 'new!'
+        assert os.listdir(tmp_path) == ['page.html']
+
+
+class TestSaveJson:
+    def test_creates_directory_and_replaces_file(self, tmp_path):
+        path = tmp_path / 'cache' / 'state.json'
+        save_json(str(path), {'title': 'caf\u00e9'})
+        save_json(str(path), {'title': 'tea'})
+        assert json.loads(path.read_text(encoding='utf-8')) == {'title': 'tea'}
+        assert os.listdir(path.parent) == ['state.json']
+
+
+class TestCopyIfChanged:
+    def test_copies_into_directory(self, tmp_path):
+        src = tmp_path / 'main.css'
+        src.write_text('body {}')
+        out = tmp_path / 'out'
+        out.mkdir()
+        assert copy_if_changed(str(src), str(out)) is True
+        assert (out / 'main.css').read_text() == 'body {}'
+
+    def test_skips_identical_file(self, tmp_path):
+        src = tmp_path / 'main.css'
+        src.write_text('body {}')
+        dst = tmp_path / 'copy.css'
+        dst.write_text('body {}')
+        assert copy_if_changed(str(src), str(dst)) is False
+
+
+class TestScanFiles:
+    def test_finds_nested_files(self, tmp_path):
+        (tmp_path / '2024' / '05').mkdir(parents=True)
+        (tmp_path / 'top.md').write_text('a')
+        (tmp_path / '2024' / '05' / 'deep.md').write_text('b')
+        (tmp_path / '2024' / 'notes.txt').write_text('c')
+        found = scan_files(str(tmp_path), ('.md',))
+        assert sorted(found) == ['2024/05/deep.md', 'top.md']
+        assert found['top.md'].stat().st_size == 1
+
+    def test_skips_hidden_and_excluded(self, tmp_path):
+        (tmp_path / '.git').mkdir()
+        (tmp_path / '.git' / 'x.md').write_text('a')
+        (tmp_path / '.draft.md').write_text('a')
+        (tmp_path / 'output').mkdir()
+        (tmp_path / 'output' / 'y.md').write_text('a')
+        assert scan_files(str(tmp_path), ('.md',), exclude=[str(tmp_path / 'output')]) == {}
+
+    def test_missing_root(self, tmp_path):
+        assert scan_files(str(tmp_path / 'missing'), ('.md',)) == {}
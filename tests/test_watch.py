@@ -0,0 +1,68 @@
+"""Tests for yakbarber.watch."""
+
+import os
+import time
+import threading
+
+import pytest
+from watchdog.events import FileModifiedEvent
+
+from yakbarber.watch import ChangeHandler
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def watch_settings(test_settings):
+    test_settings.watch_debounce = 0.01
+    return test_settings
+
+
+def post_event(settings, name):
+    return FileModifiedEvent(os.path.join(settings.content_dir, name))
+
+
+class TestChangeHandler:
+    def test_changes_during_a_build_are_rebuilt_afterward(self, watch_settings):
+        started = threading.Event()
+        release = threading.Event()
+        rebuilt = []
+        second = threading.Event()
+
+        def rebuild(changes):
+            rebuilt.append(changes.posts)
+            if len(rebuilt) == 1:
+                started.set()
+                release.wait(TIMEOUT)
+            else:
+                second.set()
+
+        handler = ChangeHandler(watch_settings, rebuild)
+        handler.on_any_event(post_event(watch_settings, 'first.md'))
+        assert started.wait(TIMEOUT)
+        handler.on_any_event(post_event(watch_settings, 'second.md'))
+        # Let the debounce timer fire and queue up behind the running build.
+        time.sleep(0.1)
+        assert len(rebuilt) == 1
+        release.set()
+        assert second.wait(TIMEOUT)
+        assert rebuilt == [{'first.md'}, {'second.md'}]
+
+    def test_failed_build_is_logged_and_retried(self, watch_settings, capsys):
+        rebuilt = []
+        done = threading.Event()
+
+        def rebuild(changes):
+            rebuilt.append(changes.posts)
+            done.set()
+            if len(rebuilt) == 1:
+                raise RuntimeError('broken template')
+
+        handler = ChangeHandler(watch_settings, rebuild)
+        handler.on_any_event(post_event(watch_settings, 'first.md'))
+        assert done.wait(TIMEOUT)
+        done.clear()
+        handler.on_any_event(post_event(watch_settings, 'second.md'))
+        assert done.wait(TIMEOUT)
+        assert rebuilt == [{'first.md'}, {'first.md', 'second.md'}]
+        assert 'RuntimeError: broken template' in capsys.readouterr().err
@@ -0,0 +1,137 @@
+"""Content-addressed image publishing for Yak Barber."""
+
+import os
+import json
+import shutil
+
+from .utils import save_json
+from .manifest import file_hash
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows.
+    fcntl = None
+
+ASSET_MANIFEST_NAME = 'assets.json'
+
+# Linux ioctl that makes dst share src's extents on copy-on-write filesystems.
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Clone src to dst without copying data. Raises OSError if unsupported."""
+    if fcntl is None:
+        raise OSError('reflinks are not supported on this platform')
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+
+
+class ImagePipeline:
+    """Publishes source images into output_dir, copying only what changed.
+
+    Each published file is recorded with its source path, the source's
+    (size, mtime) stamp and a content hash. An image whose stamp still
+    matches and whose published file still exists costs two stat calls.
+    Identical images published under several posts are hardlinked to one
+    published copy. Sources are reflinked where the filesystem allows, or
+    else copied, and never hardlinked, so editing a published file in place
+    can't change the source.
+    """
+
+    def __init__(self, settings, stats=None):
+        self.path = os.path.join(settings.cache_dir, ASSET_MANIFEST_NAME)
+        self.stats = stats
+        self.link = settings.image_links
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self._by_hash = {entry['hash']: dst for dst, entry in self.entries.items()}
+        self._made_dirs = set()
+        self.published = 0
+        self.unchanged = 0
+        self.derivatives = None
+        if settings.image_widths:
+            from .responsive import ResponsiveImages
+            self.derivatives = ResponsiveImages(settings)
+
+    def publish(self, source_file, dest_file):
+        """Make dest_file a copy of source_file if it isn't one already.
+
+        Returns:
+            True if dest_file was (re)written.
+        """
+        st = os.stat(source_file)
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self.entries.get(dest_file)
+        if entry is not None and entry['src'] == source_file and entry['stamp'] == stamp \
+                and os.path.exists(dest_file):
+            self._record(False)
+            return False
+        digest = file_hash(source_file)
+        if entry is not None and entry['hash'] == digest and os.path.exists(dest_file):
+            changed = False
+        else:
+            self._place(source_file, dest_file, digest)
+            changed = True
+        self.entries[dest_file] = {'src': source_file, 'stamp': stamp, 'hash': digest}
+        self._by_hash[digest] = dest_file
+        self._record(changed)
+        return changed
+
+    def _record(self, changed):
+        if changed:
+            self.published += 1
+        else:
+            self.unchanged += 1
+        if self.stats is not None:
+            self.stats.count('images_copied' if changed else 'image_cache_hits')
+
+    def srcset(self, dest_file, url):
+        """Return a srcset of resized derivatives for a published image, or None."""
+        entry = self.entries.get(dest_file)
+        if self.derivatives is None or entry is None:
+            return None
+        return self.derivatives.srcset(entry['src'], entry['hash'], dest_file, url)
+
+    def _place(self, source_file, dest_file, digest):
+        dest_dir = os.path.dirname(dest_file)
+        if dest_dir not in self._made_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            self._made_dirs.add(dest_dir)
+        temp_path = dest_file + '.tmp'
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        duplicate = self._by_hash.get(digest)
+        if not self._link(source_file, temp_path, duplicate):
+            shutil.copy2(source_file, temp_path)
+        os.replace(temp_path, dest_file)
+
+    def _link(self, source_file, temp_path, duplicate):
+        """Try to place temp_path without a byte copy."""
+        if not self.link:
+            return False
+        if duplicate is not None and os.path.exists(duplicate):
+            try:
+                os.link(duplicate, temp_path)
+                return True
+            except OSError:
+                pass
+        try:
+            _reflink(source_file, temp_path)
+            return True
+        except OSError:
+            return False
+
+    def save(self):
+        """Encode pending derivatives and write the manifest."""
+        if self.derivatives is not None:
+            self.derivatives.run()
+            self.derivatives.save()
+        save_json(self.path, self.entries)
@@ -0,0 +1,60 @@
+"""Mapping changed source files to the parts of the site they affect."""
+
+import os
+from dataclasses import dataclass, field
+
+from .manifest import TEMPLATE_SUFFIXES
+
+# Editor swap, backup and temporary files that never affect the site.
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp')
+
+
+@dataclass
+class ChangeSet:
+    """The outputs a batch of file changes affects.
+
+    posts holds content paths relative to content_dir. Index pages and
+    feeds are not listed: they are regenerated whenever the posts they show
+    change.
+    """
+    full: bool = False
+    about: bool = False
+    resources: bool = False
+    posts: set = field(default_factory=set)
+
+    def __bool__(self):
+        return self.full or self.about or self.resources or bool(self.posts)
+
+
+def _is_within(path, directory):
+    return os.path.commonpath([path, directory]) == directory
+
+
+def changes_for_paths(paths, settings):
+    """Classify changed file paths into a ChangeSet.
+
+    Post edits affect that post, about.markdown affects the about page, and
+    template resources are re-copied. A change to any .html or .xml template
+    rebuilds everything, as does a resource change when resources are
+    fingerprinted, since every page links to them by hash.
+    """
+    changes = ChangeSet()
+    content_dir = os.path.abspath(settings.content_dir)
+    template_dir = os.path.abspath(settings.template_dir)
+    for path in paths:
+        name = os.path.basename(path)
+        if name.startswith('.') or name.endswith(IGNORED_SUFFIXES):
+            continue
+        path = os.path.abspath(path)
+        if _is_within(path, template_dir):
+            if name.endswith(TEMPLATE_SUFFIXES) or settings.fingerprint_assets:
+                changes.full = True
+            else:
+                changes.resources = True
+        elif _is_within(path, content_dir):
+            source = os.path.relpath(path, content_dir)
+            if source == 'about.markdown':
+                changes.about = True
+            elif name.endswith(('.md', '.markdown')):
+                changes.posts.add(source)
+    return changes
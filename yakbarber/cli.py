@@ -1,60 +1,23 @@
-"""Command-line interface for Yak Barber."""
+"""Command-line interface for Yak Barber.
 
-import argparse
-import cProfile
-import time
-import threading
-
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-from .settings import load_settings
-from .engine import build
-
-# Module-level state for debouncing
-_debounce_timer = None
-_is_running = False
-
-
-class ChangeHandler(FileSystemEventHandler):
-    """Watches content and template directories for changes and triggers rebuilds."""
-
-    def __init__(self, settings):
-        self._settings = settings
-        self._lock = threading.Lock()
+Only argparse is imported before the arguments are parsed. The engine and
+its dependencies are imported once a command needs them, and watchdog only
+for --watch, so --version and --help return without loading them.
+"""
 
-    def on_modified(self, event):
-        if event.src_path.endswith(('.md', '.markdown')):
-            print(f"Detected change in {event.src_path}. Scheduling rebuild...")
-            self._schedule_build()
-
-    def on_created(self, event):
-        if event.src_path.endswith(('.md', '.markdown')):
-            print(f"Detected new file {event.src_path}. Scheduling rebuild...")
-            self._schedule_build()
-
-    def _schedule_build(self):
-        global _debounce_timer
-        if _debounce_timer is not None:
-            _debounce_timer.cancel()
-        _debounce_timer = threading.Timer(3.0, self._run_build)
-        _debounce_timer.start()
+import time
+import argparse
 
-    def _run_build(self):
-        global _is_running
-        if not _is_running:
-            _is_running = True
-            try:
-                with self._lock:
-                    build(self._settings)
-            finally:
-                _is_running = False
+from . import __version__
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Yak Barber is a fiddly little time sink, and blog system.'
     )
+    parser.add_argument(
+        '--version', action='version', version=f'Yak Barber {__version__}'
+    )
     parser.add_argument(
         '-s', '--settings', nargs=1,
         help='Specify a settings.toml file to use.'
@@ -67,27 +30,75 @@ def main():
         '-w', '--watch', action='store_true', default=False,
         help='Enable watchdog observer to monitor contentDir and templateDir.'
     )
+    parser.add_argument(
+        '-i', '--incremental', action='store_true', default=False,
+        help='Only rebuild posts and pages whose inputs changed since the last build.'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, metavar='N',
+        help='Convert and render posts in N worker processes (default: 1).'
+    )
+    parser.add_argument(
+        '--report', metavar='PATH',
+        help='Write a JSON build report with phase timings and counters to PATH.'
+    )
+    parser.add_argument(
+        '--summary', action='store_true', default=False,
+        help='Print phase timings and counters after the build.'
+    )
+    parser.add_argument(
+        '--serve', action='store_true', default=False,
+        help='Keep the site in memory, rebuild changes and serve outputDir locally.'
+    )
+    parser.add_argument(
+        '--port', type=int, default=8000,
+        help='Port for --serve (default: 8000).'
+    )
+    parser.add_argument(
+        '--list', action='store_true', default=False,
+        help='List posts from their frontmatter, newest first, without building.'
+    )
     args = parser.parse_args()
+
+    from .settings import load_settings
+    from .engine import build, post_index
+    from .manifest import BuildManifest
+
     settings_path = args.settings[0] if args.settings else 'settings.toml'
     settings = load_settings(settings_path)
-
-    if args.cprofile:
+    if args.incremental:
+        settings.incremental = True
+    if args.jobs is not None:
+        settings.jobs = args.jobs
+    if args.report:
+        settings.report_path = args.report
+
+    if args.list:
+        for summary in post_index(settings, BuildManifest.load(settings)):
+            print(f"{summary['date']:<20} {summary['slug']}.html  {summary['source']}")
+    elif args.cprofile:
+        import cProfile
         cProfile.run('build(settings)', globals={'build': build, 'settings': settings})
+    elif args.serve:
+        from .server import serve
+        serve(settings, port=args.port)
     elif args.watch:
-        observer = Observer(timeout=120)
-        event_handler = ChangeHandler(settings)
-        observer.schedule(event_handler, path=settings.content_dir, recursive=False)
-        observer.schedule(event_handler, path=settings.template_dir, recursive=True)
-        observer.start()
+        from .watch import ChangeHandler, start_observer
+        # Partial rebuilds rely on the incremental manifest.
+        settings.incremental = True
+        observer = start_observer(settings, ChangeHandler(settings))
         try:
-            build(settings)
+            print(build(settings).status_line())
             while True:
                 time.sleep(1)
         except KeyboardInterrupt:
             observer.stop()
         observer.join()
     else:
-        build(settings)
+        stats = build(settings)
+        print(stats.status_line())
+        if args.summary:
+            print(stats.report_text())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,227 @@
+"""Output minification and precompression for Yak Barber.
+
+Minifiers are applied as pages and template resources are written, so
+write_if_changed still sees identical bytes on a rebuild. HTML and CSS are
+minified here. JavaScript minification needs the optional 'rjsmin' package
+and is skipped without it. Brotli output needs the 'brotli' package, which is
+only imported when [output] brotli is set.
+
+precompress() writes .gz and .br siblings of every text file in output_dir
+so a web server can send them as-is (nginx gzip_static / brotli_static).
+Siblings are only recompressed when their source's content hash changes.
+"""
+
+import os
+import re
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import save_json, scan_files
+from .stats import BuildStats
+
+CACHE_NAME = 'compress.json'
+COMPRESSIBLE = ('.html', '.css', '.js', '.xml', '.json', '.svg', '.txt')
+# Files smaller than this gain nothing from compression.
+MIN_SIZE = 256
+
+# Comments (except conditional comments), raw-text elements and tags, with
+# quoted attribute values kept whole. Everything between is text.
+_HTML_TOKEN_RE = re.compile(
+    r'(<!--(?!\[if).*?-->)'
+    r'|<(pre|textarea|script|style)\b(?:"[^"]*"|\'[^\']*\'|[^\'">])*>.*?</\2\s*>'
+    r'|<(?:"[^"]*"|\'[^\']*\'|[^\'">])*>',
+    re.S | re.I,
+)
+# Only ASCII whitespace collapses in HTML; a no-break space must survive.
+_HTML_SPACE_RE = re.compile(r'[ \t\n\r\f]+')
+# Strings, then comments (except /*! license comments), then whitespace.
+_CSS_TOKEN_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*(?!!).*?\*/|\s+', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCTUATION_RE = re.compile(r' ?([{};,>]) ?')
+
+
+def _collapse_space(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def minify_html(html):
+    """Collapse whitespace and drop comments in HTML.
+
+    Whitespace runs become a single space, or a newline if they held one, so
+    rendering is unchanged. Tags and the contents of pre, textarea, script
+    and style elements are left exactly as they are.
+    """
+    out = []
+    pos = 0
+    for match in _HTML_TOKEN_RE.finditer(html):
+        out.append(_HTML_SPACE_RE.sub(_collapse_space, html[pos:match.start()]))
+        if not match.group(1):
+            out.append(match.group())
+        pos = match.end()
+    out.append(_HTML_SPACE_RE.sub(_collapse_space, html[pos:]))
+    return ''.join(out).strip()
+
+
+def minify_css(css):
+    """Drop comments and redundant whitespace from a stylesheet."""
+    out = []
+    code = []
+
+    def flush():
+        text = _CSS_PUNCTUATION_RE.sub(r'\1', _CSS_SPACE_RE.sub(' ', ''.join(code)).replace(': ', ':'))
+        out.append(text.replace(';}', '}'))
+        code.clear()
+
+    pos = 0
+    for match in _CSS_TOKEN_RE.finditer(css):
+        code.append(css[pos:match.start()])
+        if match.group(1):
+            flush()
+            out.append(match.group(1))
+        elif not match.group().startswith('/*'):
+            code.append(' ')
+        pos = match.end()
+    code.append(css[pos:])
+    flush()
+    return ''.join(out).strip()
+
+
+def minify_js(js):
+    """Minify JavaScript with rjsmin, or return it unchanged if that isn't installed."""
+    try:
+        import rjsmin
+    except ImportError:
+        return js
+    return rjsmin.jsmin(js)
+
+
+MINIFIERS = {'.html': minify_html, '.css': minify_css, '.js': minify_js}
+
+
+def minify(file_name, text):
+    """Minify text by the type of file_name, returning other types unchanged."""
+    minifier = MINIFIERS.get(os.path.splitext(file_name)[1])
+    return minifier(text) if minifier else text
+
+
+def _import_brotli():
+    try:
+        import brotli
+    except ImportError:
+        raise ImportError(
+            "Brotli output requires the 'brotli' package. Install it with: pip install brotli"
+        )
+    return brotli
+
+
+def _encoders(settings):
+    """Return (extension, compress function) pairs for the enabled formats."""
+    encoders = []
+    if settings.gzip_output:
+        # mtime=0 keeps the output identical across builds.
+        encoders.append(('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)))
+    if settings.brotli_output:
+        brotli = _import_brotli()
+        encoders.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return encoders
+
+
+def _has_siblings(path, exts):
+    return all(os.path.exists(path + ext) for ext in exts)
+
+
+def _compress(path, cached, encoders):
+    """Write the compressed siblings of path, unless cached shows they are current.
+
+    cached is the file's [stat, content hash, sibling extensions] cache entry,
+    or None. Siblings that would not be smaller than the file are removed
+    instead of written.
+
+    Returns:
+        (content hash, extensions of the siblings, list of the sizes written)
+        tuple. The sizes are None if the siblings were already current.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if cached is not None and cached[1] == digest and _has_siblings(path, cached[2]):
+        return digest, cached[2], None
+    exts = []
+    sizes = []
+    for ext, encode in encoders:
+        result = encode(data)
+        if len(result) >= len(data):
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+            continue
+        temp_path = path + ext + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(result)
+        os.replace(temp_path, path + ext)
+        exts.append(ext)
+        sizes.append(len(result))
+    return digest, exts, sizes
+
+
+def precompress(settings, stats=None):
+    """Write .gz/.br siblings for the text files in output_dir.
+
+    The cache in cache_dir/compress.json holds each file's stat, content hash
+    and the siblings written for it. A file whose stat is unchanged is skipped
+    without being read, and one rewritten with the same bytes is skipped after
+    hashing, as long as its siblings still exist.
+    Hashing and compression run in a thread pool. Siblings of files that were
+    removed, shrank below MIN_SIZE or whose format was disabled are deleted.
+    """
+    stats = stats or BuildStats()
+    encoders = _encoders(settings)
+    options = [ext for ext, _ in encoders]
+    cache_path = os.path.join(settings.cache_dir, CACHE_NAME)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cached_files = cache.get('files', {}) if cache.get('options') == options else {}
+
+    files = {}
+    pending = []
+    if encoders:
+        for relpath, entry in scan_files(settings.output_dir, COMPRESSIBLE).items():
+            st = entry.stat()
+            if st.st_size < MIN_SIZE:
+                continue
+            key = [st.st_mtime_ns, st.st_size]
+            cached = cached_files.get(relpath)
+            if cached is not None and cached[0] == key and _has_siblings(entry.path, cached[2]):
+                files[relpath] = cached
+                stats.count('precompress_cache_hits')
+            else:
+                pending.append((relpath, entry.path, key, cached))
+
+    if pending:
+        workers = min(max(1, settings.jobs, settings.render_concurrency), len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda job: _compress(job[1], job[3], encoders), pending)
+            for (relpath, _, key, _), (digest, exts, sizes) in zip(pending, results):
+                files[relpath] = [key, digest, exts]
+                if sizes is None:
+                    stats.count('precompress_cache_hits')
+                    continue
+                stats.count('precompressed')
+                for nbytes in sizes:
+                    stats.record(True, nbytes)
+
+    for relpath, entry in scan_files(settings.output_dir, ('.gz', '.br')).items():
+        source, ext = os.path.splitext(relpath)
+        if source.endswith(COMPRESSIBLE) and (source not in files or ext not in options):
+            os.remove(entry.path)
+
+    if not encoders:
+        # Precompression was turned off; its siblings are gone now, so is the cache.
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        return
+    save_json(cache_path, {'options': options, 'files': files})
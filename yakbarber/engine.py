@@ -2,38 +2,66 @@
 
 import os
 import re
+import json
 import shutil
-import datetime
 import asyncio
+import calendar
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-import pystache
 import markdown
 from markdown.extensions.toc import TocExtension
 
 from .utils import (
     safe_mkdir,
+    scan_files,
+    term_slug,
     split_every,
     convert_http_to_https,
-    remove_punctuation,
-    extract_tags,
-    strip_tags,
+    filter_html,
     rfc3339_convert,
+    write_if_changed,
+    copy_if_changed,
+    replace_if_changed,
 )
-
-
-def process_images(content, post_slug, source_dir, settings):
+from .manifest import BuildManifest, file_hash, data_hash
+from .frontmatter import read_frontmatter, is_post, post_summary
+from .post import Post
+from .search import search_index
+from .pagination import paginate, PAGE_FILE_RE
+from .compress import MINIFIERS, CACHE_NAME as COMPRESS_CACHE_NAME, minify, minify_html, precompress
+from .fingerprint import get_assets
+from .highlight import HighlightExtension
+from .fragments import FragmentCache, FRAGMENT_CACHE_NAME, extension_key
+from .templates import get_registry
+from .stats import BuildStats
+from .assets import ImagePipeline
+
+
+def process_images(content, post_slug, source_dir, settings, pipeline=None):
     """Find relative image paths in content, copy images to output, rewrite paths.
 
+    This is the hook for publishing a draft with its images. build() never
+    calls it; posts in content_dir are rendered with their image URLs as written.
+
     Args:
         content: HTML/markdown content string with image references.
         post_slug: The post slug (e.g. '2025-01-01-My-Post') for the output subdirectory.
         source_dir: Directory containing the source images (e.g. drafts/).
         settings: SiteSettings instance.
+        pipeline: Optional ImagePipeline shared across calls. Without one a
+            pipeline is loaded for this call and its manifest saved afterwards.
+
+    When [images] widths is set, <img> tags without a srcset also get one
+    listing resized derivatives of the published image.
 
     Returns:
         Content string with relative image paths rewritten to absolute URLs.
     """
+    own_pipeline = pipeline is None
+    if own_pipeline:
+        pipeline = ImagePipeline(settings)
     output_images_dir = os.path.join(settings.output_dir, 'images', post_slug)
+    published = {}
 
     def rewrite_match(match):
         attr = match.group(1)  # 'src' or 'srcset'
@@ -42,17 +70,33 @@ def process_images(content, post_slug, source_dir, settings):
         if '://' in path or path.startswith('/'):
             return match.group(0)
         source_file = os.path.join(source_dir, path)
-        if os.path.exists(source_file):
-            safe_mkdir(output_images_dir)
-            shutil.copy2(source_file, os.path.join(output_images_dir, os.path.basename(path)))
         new_url = f"{settings.web_root}images/{post_slug}/{path}"
+        if os.path.isfile(source_file):
+            dest_file = os.path.join(output_images_dir, os.path.basename(path))
+            pipeline.publish(source_file, dest_file)
+            published[new_url] = dest_file
         return f'{attr}="{new_url}"'
 
+    def add_srcset(match):
+        tag = match.group(0)
+        src = re.search(r'\bsrc="([^"]+)"', tag)
+        if src is None or 'srcset=' in tag or src.group(1) not in published:
+            return tag
+        srcset = pipeline.srcset(published[src.group(1)], src.group(1))
+        if srcset is None:
+            return tag
+        return f'{tag[:src.end()]} srcset="{srcset}"{tag[src.end():]}'
+
     pattern = r'(src|srcset)="([^"]+)"'
-    return re.sub(pattern, rewrite_match, content)
+    content = re.sub(pattern, rewrite_match, content)
+    if pipeline.derivatives is not None and published:
+        content = re.sub(r'<img\b[^>]*>', add_srcset, content)
+    if own_pipeline:
+        pipeline.save()
+    return content
 
 
-def process_frontmatter_image(image_value, post_slug, source_dir, settings):
+def process_frontmatter_image(image_value, post_slug, source_dir, settings, pipeline=None):
     """Rewrite a frontmatter Image field if it's a relative path.
 
     Args:
@@ -60,6 +104,7 @@ def process_frontmatter_image(image_value, post_slug, source_dir, settings):
         post_slug: The post slug for the output subdirectory.
         source_dir: Directory containing the source images.
         settings: SiteSettings instance.
+        pipeline: Optional ImagePipeline shared across calls.
 
     Returns:
         Absolute URL for the image, or the original value if already absolute.
@@ -68,17 +113,32 @@ def process_frontmatter_image(image_value, post_slug, source_dir, settings):
         return image_value
     output_images_dir = os.path.join(settings.output_dir, 'images', post_slug)
     source_file = os.path.join(source_dir, image_value)
-    if os.path.exists(source_file):
-        safe_mkdir(output_images_dir)
-        shutil.copy2(source_file, os.path.join(output_images_dir, os.path.basename(image_value)))
+    if os.path.isfile(source_file):
+        dest_file = os.path.join(output_images_dir, os.path.basename(image_value))
+        if pipeline is None:
+            pipeline = ImagePipeline(settings)
+            pipeline.publish(source_file, dest_file)
+            pipeline.save()
+        else:
+            pipeline.publish(source_file, dest_file)
     return f"{settings.web_root}images/{post_slug}/{image_value}"
 
 
-def _create_md_processor():
-    """Create a configured Markdown processor instance."""
-    return markdown.Markdown(
-        extensions=['meta', 'smarty', TocExtension(anchorlink=True)]
-    )
+def _md_extensions(settings=None):
+    """Return the Markdown extensions a processor for settings is created with."""
+    extensions = ['meta', 'smarty', TocExtension(anchorlink=True)]
+    if settings is not None and settings.highlight_code:
+        extensions += ['fenced_code', HighlightExtension()]
+    return extensions
+
+
+def _create_md_processor(settings=None):
+    """Create a configured Markdown processor instance.
+
+    With settings.highlight_code, fenced code blocks are enabled and
+    highlighted at build time.
+    """
+    return markdown.Markdown(extensions=_md_extensions(settings))
 
 
 def open_convert(mdfile, md_processor, web_root):
@@ -100,62 +160,299 @@ def open_convert(mdfile, md_processor, web_root):
         return None
 
 
-def process_posts(settings, md_processor):
-    """Process all markdown files in the content directory."""
-    posts = []
-    content_list = os.listdir(settings.content_dir)
-    for c in content_list:
-        if c.endswith('.md') or c.endswith('.markdown'):
-            mdc = open_convert(settings.content_dir + c, md_processor, settings.web_root)
-            if mdc is not None:
-                posts.append(mdc)
-    return posts
-
-
-async def render_post(post, settings):
-    """Render a single post to HTML using templates."""
-    metadata = {}
-    for k, v in post[0].items():
-        metadata[k] = v[0]
-    metadata['content'] = post[1]
-    metadata['sitename'] = settings.site_name
-    metadata['webRoot'] = settings.web_root
-    metadata['author'] = settings.author
-    metadata['typekitId'] = settings.typekit_id
-    metadata['twitterHandle'] = settings.twitter_handle
-    metadata['fediHandle'] = settings.fedi_handle
-    metadata['analyticsDomain'] = settings.analytics_domain
-    metadata['date'] = str(metadata['date'])
-    if 'image' in metadata:
-        metadata['image'] = metadata['image']
-    else:
-        metadata['image'] = settings.ogp_default_image
-    post_name = remove_punctuation(metadata['title'])
-    post_name = metadata['date'].split(' ')[0] + '-' + post_name.replace(' ', '-').replace('\u2011', '-')
-    post_name = '-'.join(post_name.split('-'))
-    post_file_name = settings.output_dir + post_name + '.html'
-    metadata['postURL'] = settings.web_root + post_name + '.html'
-    metadata['title'] = strip_tags(str(markdown.markdown(metadata['title'], extensions=['smarty'])))
-    if 'link' in metadata:
-        template_type = '/post-content-link.html'
+def _content_files(settings):
+    """Find the markdown sources under content_dir, including year/month subdirectories.
+
+    Returns:
+        Dict mapping each source's path relative to content_dir, in sorted
+        order, to its os.DirEntry.
+    """
+    found = scan_files(settings.content_dir, ('.md', '.markdown'), exclude=[settings.output_dir])
+    return {c: found[c] for c in sorted(found)}
+
+
+def _stat_key(dir_entry):
+    st = dir_entry.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+# Each pool worker gets its own Markdown processor, created once per process.
+_worker_md_processor = None
+
+
+def _init_worker(settings):
+    global _worker_md_processor
+    _worker_md_processor = _create_md_processor(settings)
+
+
+def _worker_convert(mdfile, web_root):
+    return open_convert(mdfile, _worker_md_processor, web_root)
+
+
+def _convert(mdfiles, settings, md_processor):
+    if settings.jobs <= 1 or len(mdfiles) < 2:
+        return [open_convert(mdfile, md_processor, settings.web_root) for mdfile in mdfiles]
+    workers = min(settings.jobs, len(mdfiles))
+    chunksize = max(1, len(mdfiles) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings,)) as pool:
+        return list(pool.map(
+            _worker_convert, mdfiles, [settings.web_root] * len(mdfiles), chunksize=chunksize
+        ))
+
+
+def _fragment_cache(settings):
+    """Open the persistent conversion cache for settings."""
+    config = {
+        'extensions': extension_key(_md_extensions(settings)),
+        'web_root': settings.web_root,
+        'highlight_style': settings.highlight_style if settings.highlight_code else None,
+    }
+    safe_mkdir(settings.cache_dir)
+    return FragmentCache(
+        os.path.join(settings.cache_dir, FRAGMENT_CACHE_NAME), config,
+        settings.fragment_cache_mb * 1024 * 1024,
+    )
+
+
+def convert_files(mdfiles, settings, md_processor, stats=None):
+    """Run open_convert over mdfiles, in a process pool when settings.jobs > 1.
+
+    With settings.fragment_cache, results are looked up in and added to the
+    persistent FragmentCache first, so only sources it hasn't seen are converted.
+    Only sources that are actually converted count as posts_converted.
+
+    Returns:
+        List of open_convert results (None for invalid posts) in the same
+        order as mdfiles, so parallel and serial builds produce identical output.
+    """
+    if not settings.fragment_cache or not mdfiles:
+        if stats is not None:
+            stats.count('posts_converted', len(mdfiles))
+        return _convert(mdfiles, settings, md_processor)
+    with _fragment_cache(settings) as cache:
+        keys = [cache.key(mdfile) for mdfile in mdfiles]
+        results = []
+        misses = []
+        for i, key in enumerate(keys):
+            found, result = cache.get(key)
+            results.append(result)
+            if not found:
+                misses.append(i)
+        converted = _convert([mdfiles[i] for i in misses], settings, md_processor)
+        for i, result in zip(misses, converted):
+            results[i] = result
+            cache.put(keys[i], result)
+        if stats is not None:
+            stats.count('posts_converted', len(misses))
+            stats.count('fragment_cache_hits', cache.hits)
+            stats.count('fragment_cache_misses', cache.misses)
+    return results
+
+
+def post_index(settings, manifest=None):
+    """List every post's title, date, slug, link and image without converting markdown.
+
+    Only each source's frontmatter is read. With a manifest, summaries of
+    sources whose size and modification time are unchanged are reused.
+
+    Returns:
+        List of post_summary dicts, each with its content path as 'source',
+        newest first.
+    """
+    index = []
+    for c, dir_entry in _content_files(settings).items():
+        entry = manifest.posts.get(c) if manifest is not None else None
+        if entry is not None and 'summary' in entry and entry.get('stat') == _stat_key(dir_entry):
+            summary = entry['summary']
+        else:
+            summary = post_summary(read_frontmatter(dir_entry.path))
+        if summary is not None:
+            index.append(dict(summary, source=c))
+    return sorted(index, key=lambda x: x['date'], reverse=True)
+
+
+def process_posts(settings, md_processor, stats=None):
+    """Process all markdown files in the content directory.
+
+    Files whose frontmatter has no usable title are skipped before conversion.
+    """
+    mdfiles = [
+        entry.path for entry in _content_files(settings).values()
+        if is_post(read_frontmatter(entry.path))
+    ]
+    return [mdc for mdc in convert_files(mdfiles, settings, md_processor, stats) if mdc is not None]
+
+
+async def render_changed_posts(settings, md_processor, manifest, stats=None, only=None):
+    """Convert and render only the posts whose inputs changed since the last build.
+
+    Unchanged posts are served from the manifest, so their markdown is not
+    converted and their page is not rewritten. A source whose size and
+    modification time match the manifest is trusted without being read, and
+    one whose frontmatter has no usable title is never converted. Pages of
+    posts that were deleted or now render under another name are removed.
+
+    Args:
+        only: Optional set of content paths known to have changed. Other
+            sources already in the manifest are trusted without re-hashing.
+
+    Returns:
+        List of rendered metadata dicts for every valid post, as render_post returns them.
+    """
+    stats = stats or BuildStats()
+    previous_outputs = manifest.post_outputs()
+    with stats.phase('process_posts'):
+        sources = _content_files(settings)
+        entries = []
+        stale = []
+        for c, dir_entry in sources.items():
+            entry = manifest.posts.get(c, {})
+            if 'post' in entry and (only is not None and c not in only
+                                    or entry.get('stat') == _stat_key(dir_entry)):
+                entries.append(entry)
+                continue
+            digest = file_hash(dir_entry.path)
+            stats.count('posts_hashed')
+            entry = manifest.cached_post(c, digest)
+            if entry is None:
+                entry = {'hash': digest, 'summary': post_summary(read_frontmatter(dir_entry.path))}
+                manifest.posts[c] = entry
+                if entry['summary'] is None:
+                    entry['post'] = None
+                else:
+                    stale.append(c)
+            entry['stat'] = _stat_key(dir_entry)
+            entries.append(entry)
+        converted = convert_files([sources[c].path for c in stale], settings, md_processor, stats)
+        for c, mdc in zip(stale, converted):
+            manifest.posts[c]['post'] = mdc
+        stats.count('post_cache_hits', len(entries) - len(stale))
+        stats.count('post_cache_misses', len(stale))
+
+    rendered_posts = []
+    pending = []
+    for entry in entries:
+        if entry['post'] is None:
+            continue
+        rendered = entry.get('rendered')
+        if rendered is not None and os.path.exists(entry['output']):
+            rendered_posts.append(dict(rendered))
+            stats.record(False)
+        else:
+            pending.append(entry)
+    with stats.phase('render_post'):
+        results = await render_posts([entry['post'] for entry in pending], settings, stats)
+    for entry, metadata in zip(pending, results):
+        entry['rendered'] = dict(metadata)
+        entry['output'] = settings.output_dir + os.path.basename(metadata['postURL'])
+        rendered_posts.append(metadata)
+    manifest.prune(sources, previous_outputs)
+    return rendered_posts
+
+
+def _finish_page(html, settings):
+    """Point a rendered page at fingerprinted assets and minify it, as settings ask."""
+    if settings.fingerprint_assets:
+        html = get_assets(settings).rewrite(html)
+    if settings.minify_output:
+        html = minify_html(html)
+    return html
+
+
+def write_post(post, settings):
+    """Render a single post to HTML using templates and write it to output_dir.
+
+    This is the blocking half of render_post, safe to run in a worker thread
+    or process.
+
+    Args:
+        post: A Post, or an open_convert [Meta, html] result.
+        settings: SiteSettings instance.
+
+    Returns:
+        (metadata, changed, nbytes) tuple, where changed is False if the page
+        on disk was already up to date and nbytes is the page's size.
+    """
+    if not isinstance(post, Post):
+        post = Post.from_converted(post)
+    metadata = post.context(settings)
+    post_file_name = settings.output_dir + post.slug + '.html'
+    if post.link is not None:
+        template_type = 'post-content-link.html'
     else:
-        template_type = '/post-content.html'
-    with open(settings.template_dir + template_type, 'r', encoding='utf-8') as f:
-        post_content_template = f.read()
-        post_content = pystache.render(post_content_template, metadata, decode_errors='ignore')
-        metadata['post-content'] = post_content
-    with open(settings.template_dir + '/post-page.html', 'r', encoding='utf-8') as f:
-        post_page_template = f.read()
-        post_page_result = pystache.render(post_page_template, metadata, decode_errors='ignore')
-    with open(post_file_name, 'w', encoding='utf-8') as f:
-        f.write(post_page_result)
+        template_type = 'post-content.html'
+    templates = get_registry(settings.template_dir)
+    # Asset URLs are site-wide, so they stay out of the returned metadata.
+    page = dict(metadata, asset=get_assets(settings).urls)
+    metadata['post-content'] = page['post-content'] = templates.render(template_type, page)
+    post_page_result = _finish_page(templates.render('post-page.html', page), settings)
+    changed = write_if_changed(post_file_name, post_page_result)
+    return metadata, changed, os.path.getsize(post_file_name)
+
+
+async def render_post(post, settings, executor=None, stats=None):
+    """Render a single post without blocking the event loop.
+
+    Args:
+        post: [metadata_dict, html_string] as returned by open_convert.
+        settings: SiteSettings instance.
+        executor: Executor to run write_post in; None uses the loop's default thread pool.
+        stats: Optional BuildStats to record the page write in.
+
+    Returns:
+        The rendered metadata dict.
+    """
+    loop = asyncio.get_running_loop()
+    metadata, changed, nbytes = await loop.run_in_executor(executor, write_post, post, settings)
+    if stats is not None:
+        stats.count('posts_rendered')
+        stats.record(changed, nbytes)
     return metadata
 
 
-def about_page(settings, md_processor):
+async def render_posts(posts, settings, stats=None):
+    """Render posts concurrently, returning their metadata in input order.
+
+    With settings.jobs > 1 pages are rendered in that many worker processes,
+    otherwise in up to settings.render_concurrency threads.
+    """
+    if not posts:
+        return []
+    if settings.jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=settings.jobs)
+    else:
+        executor = ThreadPoolExecutor(max_workers=max(1, settings.render_concurrency))
+    with executor:
+        return await asyncio.gather(*[
+            render_post(post, settings, executor, stats) for post in posts
+        ])
+
+
+def _output_is_current(manifest, file_name, key, stats):
+    """True if the manifest shows file_name is already generated from key.
+
+    Otherwise key is recorded for file_name, which the caller then writes.
+    Either way the output cache hit or miss is counted in stats.
+    """
+    if manifest.is_fresh(file_name, key):
+        stats.count('output_cache_hits')
+        stats.record(False)
+        return True
+    stats.count('output_cache_misses')
+    manifest.record_output(file_name, key)
+    return False
+
+
+def about_page(settings, md_processor, manifest=None, stats=None):
     """Generate the about page from about.markdown."""
+    stats = stats or BuildStats()
+    about_source = settings.content_dir + 'about.markdown'
+    about_file_name = settings.output_dir + 'about.html'
+    if manifest is not None:
+        if _output_is_current(manifest, about_file_name, file_hash(about_source), stats):
+            return
     md_processor.reset()
-    with open(settings.content_dir + 'about.markdown', 'r', encoding='utf-8') as f:
+    with open(about_source, 'r', encoding='utf-8') as f:
         rawfile = f.read()
     converted = {
         'about': md_processor.convert(rawfile),
@@ -166,45 +463,89 @@ def about_page(settings, md_processor):
         'twitterHandle': settings.twitter_handle,
         'fediHandle': settings.fedi_handle,
         'analyticsDomain': settings.analytics_domain,
+        'asset': get_assets(settings).urls,
     }
-    with open(settings.template_dir + 'about.html', 'r', encoding='utf-8') as f:
-        about_template = f.read()
-    with open(settings.output_dir + 'about.html', 'w', encoding='utf-8') as f:
-        about_result = pystache.render(about_template, converted)
-        f.write(about_result)
+    about_result = _finish_page(get_registry(settings.template_dir).render('about.html', converted), settings)
+    stats.record(write_if_changed(about_file_name, about_result), len(about_result.encode('utf-8')))
+
+
+# Feed entries are rendered this many at a time and written through a buffered file.
+FEED_CHUNK_SIZE = 100
+FEED_BUFFER_SIZE = 1 << 16
+
+
+def _feed_entry(post, settings):
+    """Return a sanitized copy of a rendered post for use as an Atom entry.
+
+    The title is already plain text (Post.display_title), so only the content is filtered.
+    """
+    entry = dict(post)
+    entry['date'] = post.get('atomDate') or rfc3339_convert(post['date'])
+    entry['content'] = filter_html(post['content'], settings.feed_strip_tags)[0]
+    return entry
 
 
-def feed(posts, settings):
-    """Generate the Atom XML feed."""
+def _write_feed(file_name, feed_dict, posts, settings):
+    """Stream an Atom feed for posts to file_name, one chunk of entries at a time.
+
+    The feed is streamed to a temporary file that only replaces file_name if
+    its contents differ.
+
+    Returns:
+        True if file_name changed.
+    """
+    templates = get_registry(settings.template_dir)
+    sentinel = '\0atom-entry\0'
+    feed_result = templates.render('atom.xml', dict(feed_dict, **{'atom-entry': sentinel}))
+    head, _, tail = feed_result.partition(sentinel)
+    temp_path = file_name + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8', buffering=FEED_BUFFER_SIZE) as f:
+        f.write(head)
+        for chunk in split_every(FEED_CHUNK_SIZE, posts):
+            f.write(''.join(
+                templates.render('atom-entry.xml', _feed_entry(p, settings)) for p in chunk
+            ))
+        f.write(tail)
+    return replace_if_changed(temp_path, file_name)
+
+
+def _publish_feed(file_name, feed_dict, posts, settings, manifest=None, stats=None):
+    """Write one Atom feed unless the manifest shows it is already current."""
+    stats = stats or BuildStats()
+    if manifest is not None:
+        key = data_hash([feed_dict['sitename'], feed_dict['feedURL']] + [data_hash(p) for p in posts])
+        if _output_is_current(manifest, file_name, key, stats):
+            return
+    changed = _write_feed(file_name, feed_dict, posts, settings)
+    stats.record(changed, os.path.getsize(file_name))
+
+
+def _feed_dict(posts, settings, feed_url):
     feed_dict = posts[0].copy()
-    entry_list = str()
-    feed_dict['gen-time'] = datetime.datetime.now(datetime.timezone.utc).isoformat('T') + 'Z'
-    with open(settings.template_dir + '/atom.xml', 'r', encoding='utf-8') as f:
-        atom_template = f.read()
-    with open(settings.template_dir + '/atom-entry.xml', 'r', encoding='utf-8') as f:
-        atom_entry_template = f.read()
-    for e, p in enumerate(posts):
-        p['date'] = rfc3339_convert(p['date'])
-        p['content'] = extract_tags(p['content'], 'script')
-        p['content'] = extract_tags(p['content'], 'object')
-        p['content'] = extract_tags(p['content'], 'iframe')
-        p['title'] = strip_tags(p['title'])
-        if e < 50:
-            atom_entry_result = pystache.render(atom_entry_template, p)
-            entry_list += atom_entry_result
-    feed_dict['atom-entry'] = entry_list
-    feed_result = pystache.render(atom_template, feed_dict, string_encode='utf-8')
-    with open(settings.output_dir + 'feed.xml', 'w', encoding='utf-8') as f:
-        f.write(feed_result)
-
-
-def paginated_index(posts, settings):
-    """Generate paginated index pages."""
-    index_list = posts
-    index_of_posts = split_every(settings.posts_per_page, index_list)
-    with open(settings.template_dir + '/index.html', 'r', encoding='utf-8') as f:
-        index_template = f.read()
-    index_dict = {
+    feed_dict['gen-time'] = posts[0].get('atomDate') or rfc3339_convert(posts[0]['date'])
+    feed_dict['feedURL'] = feed_url
+    return feed_dict
+
+
+def feed(posts, settings, manifest=None, stats=None):
+    """Generate the Atom XML feed, and the full-archive feed if enabled.
+
+    Only the newest settings.feed_entries posts are sanitized and written to
+    feed.xml. The archive feed streams every post to feed-archive.xml. The
+    feed's updated time is the newest post's date, so an unchanged site
+    produces an identical feed.
+    """
+    feeds = [('feed.xml', posts[:settings.feed_entries])]
+    if settings.feed_archive:
+        feeds.append(('feed-archive.xml', posts))
+    for name, feed_posts in feeds:
+        feed_dict = _feed_dict(posts, settings, settings.web_root + name)
+        _publish_feed(settings.output_dir + name, feed_dict, feed_posts, settings, manifest, stats)
+
+
+def _index_context(settings):
+    """Return the site-wide template variables for listing pages."""
+    return {
         'sitename': settings.site_name,
         'typekitId': settings.typekit_id,
         'webRoot': settings.web_root,
@@ -212,52 +553,289 @@ def paginated_index(posts, settings):
         'twitterHandle': settings.twitter_handle,
         'fediHandle': settings.fedi_handle,
         'analyticsDomain': settings.analytics_domain,
+        'archiveURL': settings.web_root + 'archive/index.html' if settings.archive_dates else '',
+        'searchEnabled': settings.search_enabled,
+        'asset': get_assets(settings).urls,
     }
-    for e, p in enumerate(index_of_posts):
-        index_dict['post-content'] = p
-        if e == 0:
-            file_name = 'index.html'
-            if len(index_list) > settings.posts_per_page:
-                index_dict['previous'] = settings.web_root + 'index2.html'
-        else:
-            file_name = 'index' + str(e + 1) + '.html'
-            if e == 1:
-                index_dict['next'] = settings.web_root + 'index.html'
-                index_dict['previous'] = settings.web_root + 'index' + str(e + 2) + '.html'
+
+
+def paginated_index(posts, settings, manifest=None, stats=None):
+    """Generate the paginated home page listing."""
+    _write_listing(posts, settings, '', _index_context(settings), manifest, stats)
+
+
+def _write_page(file_name, context, settings, manifest=None, stats=None):
+    """Render context through the index template to file_name, skipping it if the manifest has it current."""
+    stats = stats or BuildStats()
+    if manifest is not None and _output_is_current(manifest, file_name, data_hash(context), stats):
+        return
+    result = _finish_page(get_registry(settings.template_dir).render('index.html', context), settings)
+    stats.record(write_if_changed(file_name, result), len(result.encode('utf-8')))
+
+
+def _write_listing(posts, settings, prefix, context, manifest=None, stats=None):
+    """Write posts as linked pages of settings.posts_per_page under output_dir/prefix.
+
+    Pages are laid out by pagination.paginate in settings.pagination mode.
+    Listing pages left over from a longer listing or the other mode are removed.
+    """
+    directory = settings.output_dir + prefix
+    safe_mkdir(directory)
+    pages = paginate(posts, settings.posts_per_page, settings.pagination)
+    for page in pages:
+        page_context = dict(context)
+        page_context['post-content'] = page.posts
+        if page.previous:
+            page_context['previous'] = settings.web_root + prefix + page.previous
+        if page.next:
+            page_context['next'] = settings.web_root + prefix + page.next
+        _write_page(directory + page.file_name, page_context, settings, manifest, stats)
+    current = {page.file_name for page in pages}
+    for name in os.listdir(directory):
+        if PAGE_FILE_RE.fullmatch(name) and name not in current:
+            os.remove(directory + name)
+            if manifest is not None:
+                manifest.outputs.pop(directory + name, None)
+
+
+# Output directory and page heading for each kind of archive.
+ARCHIVE_KINDS = {
+    'category': ('category', 'Category'),
+    'tag': ('tag', 'Tag'),
+    'year': ('archive', 'Archive'),
+    'month': ('archive', 'Archive'),
+}
+DATE_RE = re.compile(r'(\d{4})-(\d{2})-')
+# Directory names of year and month archives.
+YEAR_DIR_RE = re.compile(r'\d{4}')
+MONTH_DIR_RE = re.compile(r'\d{2}')
+
+
+def archive_index(posts, settings):
+    """Group posts into archives and list them for posts.json, in a single pass.
+
+    Args:
+        posts: Rendered post metadata, newest first.
+        settings: SiteSettings instance; disabled archive kinds are left empty.
+
+    Returns:
+        (archives, entries) tuple. archives maps each kind in ARCHIVE_KINDS
+        to a dict of slug to (name, posts) pairs; years are keyed '2024' and
+        months '2024/03'. Posts keep their order, and categories or tags that
+        differ only in case or punctuation share one archive under the first
+        name seen. entries lists each post's title, date, URL and category.
+    """
+    index = {kind: {} for kind in ARCHIVE_KINDS}
+    entries = []
+    for post in posts:
+        terms = []
+        if settings.archive_categories and post.get('category'):
+            terms.append(('category', term_slug(post['category']), post['category']))
+        if settings.archive_tags:
+            terms.extend(('tag', term_slug(t['tag']), t['tag']) for t in post.get('tag-pages', ()))
+        match = DATE_RE.match(post['date'])
+        if settings.archive_dates and match and 1 <= int(match.group(2)) <= 12:
+            year, month = match.groups()
+            terms.append(('year', year, year))
+            terms.append(('month', f"{year}/{month}", f"{calendar.month_name[int(month)]} {year}"))
+        for kind, slug, name in terms:
+            if slug:
+                index[kind].setdefault(slug, (name, []))[1].append(post)
+        if settings.post_index_json:
+            entries.append({
+                'title': post['title'],
+                'date': post['date'],
+                'url': post['postURL'],
+                'category': post.get('category', ''),
+            })
+    return index, entries
+
+
+def _write_post_index(entries, settings, manifest=None, stats=None):
+    """Write posts.json, skipping it entirely when no listed field changed."""
+    stats = stats or BuildStats()
+    file_name = settings.output_dir + 'posts.json'
+    if manifest is not None and _output_is_current(manifest, file_name, data_hash(entries), stats):
+        return
+    result = json.dumps(entries, ensure_ascii=False, separators=(',', ':')) + '\n'
+    stats.record(write_if_changed(file_name, result), len(result.encode('utf-8')))
+
+
+def _remove_tree(path, manifest=None):
+    """Delete the directory at path and forget the outputs the manifest recorded in it."""
+    shutil.rmtree(path)
+    if manifest is not None:
+        prefix = path + '/'
+        for output in [o for o in manifest.outputs if o.startswith(prefix)]:
+            del manifest.outputs[output]
+
+
+def _prune_archives(index, settings, manifest=None):
+    """Remove archive directories and pages for terms and dates that no longer have posts."""
+    for kind in ('category', 'tag', 'year'):
+        path = settings.output_dir + ARCHIVE_KINDS[kind][0]
+        if not os.path.isdir(path):
+            continue
+        for name in os.listdir(path):
+            if name in index[kind] or kind == 'year' and not YEAR_DIR_RE.fullmatch(name):
+                continue
+            if os.path.isdir(f"{path}/{name}"):
+                _remove_tree(f"{path}/{name}", manifest)
+    for year in index['year']:
+        path = f"{settings.output_dir}archive/{year}"
+        for name in os.listdir(path) if os.path.isdir(path) else ():
+            if MONTH_DIR_RE.fullmatch(name) and f"{year}/{name}" not in index['month'] \
+                    and os.path.isdir(f"{path}/{name}"):
+                _remove_tree(f"{path}/{name}", manifest)
+    archive_page = settings.output_dir + 'archive/index.html'
+    if not index['year'] and os.path.exists(archive_page):
+        os.remove(archive_page)
+        if manifest is not None:
+            manifest.outputs.pop(archive_page, None)
+
+
+def archives(posts, settings, manifest=None, stats=None):
+    """Write category, tag and date archive pages, archive feeds and posts.json.
+
+    Category and tag archives also get an Atom feed. Year pages link to
+    their months, and archive/index.html links to every year. Archives left
+    over from terms or dates that no longer have posts are removed.
+    """
+    index, entries = archive_index(posts, settings)
+    _prune_archives(index, settings, manifest)
+    for kind, terms in index.items():
+        directory, heading = ARCHIVE_KINDS[kind]
+        for slug, (name, term_posts) in terms.items():
+            prefix = f"{directory}/{slug}/"
+            context = _index_context(settings)
+            context['archive-kind'] = heading
+            context['archive-title'] = name
+            if kind == 'year':
+                context['archive-links'] = [
+                    {'name': month_name, 'url': f"{settings.web_root}archive/{month}/index.html"}
+                    for month, (month_name, _) in index['month'].items() if month.startswith(slug + '/')
+                ]
+            if settings.archive_feeds and kind in ('category', 'tag'):
+                context['archive-feed'] = settings.web_root + prefix + 'feed.xml'
+            _write_listing(term_posts, settings, prefix, context, manifest, stats)
+            if 'archive-feed' in context:
+                feed_dict = _feed_dict(term_posts, settings, context['archive-feed'])
+                feed_dict['sitename'] = f"{settings.site_name}: {name}"
+                _publish_feed(settings.output_dir + prefix + 'feed.xml', feed_dict,
+                              term_posts[:settings.feed_entries], settings, manifest, stats)
+    if index['year']:
+        context = _index_context(settings)
+        context['archive-kind'] = 'Archive'
+        context['archive-title'] = 'All Posts'
+        context['archive-links'] = [
+            {'name': year, 'url': f"{settings.web_root}archive/{year}/index.html"} for year in index['year']
+        ]
+        _write_page(settings.output_dir + 'archive/index.html', context, settings, manifest, stats)
+    if settings.post_index_json:
+        _write_post_index(entries, settings, manifest, stats)
+
+
+def template_resources(settings, stats=None):
+    """Copy non-HTML/XML template files to output directory.
+
+    CSS and JavaScript are minified on the way when settings.minify_output is
+    set, and generated resources such as pygments.css are written alongside.
+    With settings.fingerprint_assets each file is also written under its
+    fingerprinted name, and fingerprinted copies from earlier builds are removed.
+    """
+    stats = stats or BuildStats()
+    assets = get_assets(settings)
+    for name, published in assets.names.items():
+        full_path = os.path.join(settings.template_dir, name)
+        targets = [name] if published == name else [name, published]
+        if name in assets.generated or settings.minify_output and name.endswith(tuple(MINIFIERS)):
+            if name in assets.generated:
+                result = assets.generated[name]
             else:
-                index_dict['previous'] = settings.web_root + 'index' + str(e + 2) + '.html'
-                if e < len(index_list):
-                    index_dict['next'] = settings.web_root + 'index' + str(e - 1) + '.html'
-        index_page_result = pystache.render(index_template, index_dict)
-        with open(settings.output_dir + file_name, 'w', encoding='utf-8') as f:
-            f.write(index_page_result)
-
-
-def template_resources(settings):
-    """Copy non-HTML/XML template files to output directory."""
-    t_list = os.listdir(settings.template_dir)
-    t_list = [x for x in t_list if not x.endswith(('.html', '.xml'))]
-    for tr in t_list:
-        full_path = os.path.join(settings.template_dir, tr)
-        if os.path.isfile(full_path):
-            shutil.copy(full_path, settings.output_dir)
-
-
-async def start(settings):
-    """Run the full site build."""
-    md_processor = _create_md_processor()
-    about_page(settings, md_processor)
-    posts = process_posts(settings, md_processor)
-    rendered_posts = await asyncio.gather(*[render_post(post, settings) for post in posts])
-    sorted_rendered_posts = sorted(rendered_posts, key=lambda x: x['date'])[::-1]
-    paginated_index(sorted_rendered_posts, settings)
-    feed(sorted_rendered_posts, settings)
-    template_resources(settings)
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    result = f.read()
+            if settings.minify_output:
+                result = minify(name, result)
+            for target in targets:
+                changed = write_if_changed(os.path.join(settings.output_dir, target), result)
+                stats.record(changed, len(result.encode('utf-8')))
+        else:
+            for target in targets:
+                changed = copy_if_changed(full_path, os.path.join(settings.output_dir, target))
+                stats.record(changed, os.path.getsize(full_path))
+    for name in os.listdir(settings.output_dir):
+        if assets.is_stale(name):
+            os.remove(os.path.join(settings.output_dir, name))
 
 
-def build(settings):
-    """Synchronous entry point for building the site."""
+async def start(settings, changes=None, manifest=None):
+    """Run the site build.
+
+    Args:
+        settings: SiteSettings instance.
+        changes: Optional ChangeSet. When given, only the parts of the site it
+            affects are rebuilt, using the incremental manifest.
+        manifest: Optional BuildManifest kept in memory by the caller. It is
+            updated in place and not saved; saving is left to the caller.
+
+    Returns:
+        BuildStats for the build.
+    """
+    stats = BuildStats()
+    md_processor = _create_md_processor(settings)
+    partial = changes is not None and not changes.full
+    save_manifest = manifest is None
+    if manifest is None and (settings.incremental or partial):
+        manifest = BuildManifest.load(settings)
+    if manifest is not None:
+        manifest.update_fingerprints(settings)
+    if not partial or changes.about:
+        with stats.phase('about_page'):
+            about_page(settings, md_processor, manifest, stats)
+    if manifest is not None:
+        rendered_posts = await render_changed_posts(
+            settings, md_processor, manifest, stats, changes.posts if partial else None
+        )
+    else:
+        with stats.phase('process_posts'):
+            posts = process_posts(settings, md_processor, stats)
+        with stats.phase('render_post'):
+            rendered_posts = await render_posts(posts, settings, stats)
+    sorted_rendered_posts = sorted(rendered_posts, key=lambda x: x['date'])[::-1]
+    with stats.phase('paginated_index'):
+        paginated_index(sorted_rendered_posts, settings, manifest, stats)
+    with stats.phase('feed'):
+        feed(sorted_rendered_posts, settings, manifest, stats)
+    with stats.phase('archives'):
+        archives(sorted_rendered_posts, settings, manifest, stats)
+    if settings.search_enabled:
+        with stats.phase('search_index'):
+            search_index(sorted_rendered_posts, settings, manifest is not None, stats)
+    if not partial or changes.resources:
+        with stats.phase('template_resources'):
+            template_resources(settings, stats)
+    if (settings.gzip_output or settings.brotli_output
+            or os.path.exists(os.path.join(settings.cache_dir, COMPRESS_CACHE_NAME))):
+        with stats.phase('precompress'):
+            precompress(settings, stats)
+    if manifest is not None and save_manifest:
+        manifest.save()
+    return stats
+
+
+def build(settings, changes=None, manifest=None):
+    """Synchronous entry point for building the site.
+
+    Pass a ChangeSet as changes to rebuild only what it affects, and an
+    in-memory BuildManifest to skip loading and saving it.
+    """
     safe_mkdir(settings.content_dir)
     safe_mkdir(settings.template_dir)
     safe_mkdir(settings.output_dir)
-    asyncio.run(start(settings))
+    get_registry(settings.template_dir).refresh()
+    get_assets(settings).refresh()
+    stats = asyncio.run(start(settings, changes, manifest))
+    stats.finish()
+    if settings.report_path:
+        stats.write_report(settings.report_path)
+    return stats
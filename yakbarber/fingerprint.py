@@ -0,0 +1,122 @@
+"""Content-hashed names for Yak Barber's template resources."""
+
+import os
+import re
+import hashlib
+
+from .compress import MINIFIERS
+from .highlight import highlight_css
+
+# Hex digits of the content hash put into a fingerprinted file name.
+FINGERPRINT_LENGTH = 10
+# A fingerprinted file name, split into stem, hash and extension.
+FINGERPRINT_RE = re.compile(r'(.+)\.([0-9a-f]{%d})((?:\.[^.]+)?)' % FINGERPRINT_LENGTH)
+
+
+def resource_names(template_dir):
+    """Return the sorted names of the files in template_dir that are copied to the output."""
+    return sorted(
+        name for name in os.listdir(template_dir)
+        if not name.endswith(('.html', '.xml'))
+        and os.path.isfile(os.path.join(template_dir, name))
+    )
+
+
+def asset_key(name):
+    """Return the template key for a resource: main.css is {{asset.main_css}}."""
+    return re.sub(r'\W', '_', name)
+
+
+def fingerprinted_name(name, digest):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}'
+
+
+class StaticAssets:
+    """Published file names and URLs of a template directory's resources.
+
+    Resources generated by the build, such as pygments.css for
+    settings.highlight_code, are held in generated and published alongside
+    the template files, which take precedence over them.
+
+    With settings.fingerprint_assets each resource is also published under
+    a name containing a hash of the bytes that are written, such as
+    main.0123456789.css, so it can be cached forever. Hashes are kept
+    until a resource's size or modification time changes.
+    """
+
+    def __init__(self, settings):
+        self.template_dir = settings.template_dir
+        self.web_root = settings.web_root
+        self.minify = settings.minify_output
+        self.fingerprint = settings.fingerprint_assets
+        self.highlight_style = settings.highlight_style if settings.highlight_code else None
+        self._hashes = {}
+        self.generated = {}
+        self.names = {}
+        self.urls = {}
+        self.refresh()
+
+    def _digest(self, name):
+        h = hashlib.sha256()
+        if name in self.generated:
+            h.update(self.generated[name].encode('utf-8'))
+        else:
+            path = os.path.join(self.template_dir, name)
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            cached = self._hashes.get(name)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        # Minified output differs from the source, so it needs its own name.
+        if self.minify and name.endswith(tuple(MINIFIERS)):
+            h.update(b'\0minified')
+        digest = h.hexdigest()
+        if name not in self.generated:
+            self._hashes[name] = (stamp, digest)
+        return digest
+
+    def refresh(self):
+        """Rescan the template directory, rehashing resources that changed."""
+        sources = resource_names(self.template_dir)
+        self.generated = {}
+        if self.highlight_style and 'pygments.css' not in sources:
+            self.generated['pygments.css'] = highlight_css(self.highlight_style)
+        names = {}
+        for name in sorted(sources + list(self.generated)):
+            names[name] = fingerprinted_name(name, self._digest(name)) if self.fingerprint else name
+        self._hashes = {name: self._hashes[name] for name in names if name in self._hashes}
+        self.names = names
+        self.urls = {asset_key(name): self.web_root + published for name, published in names.items()}
+
+    def rewrite(self, html):
+        """Point quoted webRoot references to resources at their fingerprinted names."""
+        for name, published in self.names.items():
+            if published != name:
+                for quote in ('"', "'"):
+                    html = html.replace(quote + self.web_root + name + quote,
+                                        quote + self.web_root + published + quote)
+        return html
+
+    def is_stale(self, file_name):
+        """True if file_name is a fingerprinted copy of a resource that is no longer published."""
+        match = FINGERPRINT_RE.fullmatch(file_name)
+        if match is None:
+            return False
+        name = match.group(1) + match.group(3)
+        return name in self.names and self.names[name] != file_name
+
+
+_assets = {}
+
+
+def get_assets(settings):
+    """Return the process-wide StaticAssets for settings' template directory."""
+    key = (settings.template_dir, settings.web_root, settings.minify_output,
+           settings.fingerprint_assets, settings.highlight_code, settings.highlight_style)
+    assets = _assets.get(key)
+    if assets is None:
+        assets = _assets[key] = StaticAssets(settings)
+    return assets
@@ -0,0 +1,113 @@
+"""Persistent cache of converted markdown for Yak Barber.
+
+Conversions are stored in an SQLite database in cache_dir, keyed by a hash
+of the source bytes and of everything else that shapes the output: the
+Markdown version, the extension configuration and the settings open_convert
+uses. A build in a fresh process, or after a settings change that empties
+the incremental manifest, reuses every conversion whose inputs are the same.
+"""
+
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+
+import markdown
+
+from . import __version__
+
+FRAGMENT_CACHE_NAME = 'fragments.sqlite'
+# Bump when a change to open_convert or its extensions changes converted output.
+FRAGMENT_VERSION = 1
+# Fastest zlib level; higher levels save little on HTML but double the cost.
+COMPRESS_LEVEL = 1
+
+
+def extension_key(extensions):
+    """Describe Markdown extensions, given as names or instances, as JSON-serialisable data."""
+    described = []
+    for ext in extensions:
+        if isinstance(ext, str):
+            described.append(ext)
+            continue
+        config = {}
+        for name, value in sorted(ext.getConfigs().items()):
+            if callable(value):
+                value = f'{value.__module__}.{value.__qualname__}'
+            config[name] = value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+        described.append([f'{type(ext).__module__}.{type(ext).__qualname__}', config])
+    return described
+
+
+class FragmentCache:
+    """Size-bounded LRU store of open_convert results.
+
+    Each entry holds the zlib-compressed JSON of an open_convert result,
+    including None for sources that are not posts. Lookups record when an
+    entry was last used. On close, the least recently used entries are
+    evicted until the stored size is within max_bytes.
+
+    Use as a context manager, or call close() to evict and commit.
+    """
+
+    def __init__(self, path, config, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._config = json.dumps(
+            [FRAGMENT_VERSION, __version__, markdown.__version__, config], sort_keys=True
+        ).encode('utf-8')
+        self._used = {}
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS fragments '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL)'
+        )
+
+    def key(self, source_file):
+        """Return the cache key for a markdown source file."""
+        h = hashlib.sha256(self._config)
+        with open(source_file, 'rb') as f:
+            h.update(f.read())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Return (True, result) for a cached conversion, or (False, None)."""
+        row = self._db.execute('SELECT value FROM fragments WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._used[key] = time.time_ns()
+        return True, json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, result):
+        value = zlib.compress(json.dumps(result, ensure_ascii=False).encode('utf-8'), COMPRESS_LEVEL)
+        self._db.execute(
+            'INSERT OR REPLACE INTO fragments (key, value, size, used) VALUES (?, ?, ?, ?)',
+            (key, value, len(value), time.time_ns()),
+        )
+
+    def close(self):
+        """Record lookups, evict least recently used entries over max_bytes and commit."""
+        with self._db:
+            self._db.executemany(
+                'UPDATE fragments SET used = ? WHERE key = ?',
+                [(used, key) for key, used in self._used.items()],
+            )
+            self._db.execute(
+                'DELETE FROM fragments WHERE key IN (SELECT key FROM '
+                '(SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS total FROM fragments) '
+                'WHERE total > ?)',
+                (self.max_bytes,),
+            )
+        self._db.close()
+        self._used = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
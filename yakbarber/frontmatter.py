@@ -0,0 +1,70 @@
+"""Fast frontmatter scanning for Yak Barber.
+
+Reads only the metadata header of a markdown source, following the same
+rules as the Markdown meta extension, so post listings and validity checks
+don't need a full conversion.
+"""
+
+import re
+
+from .post import Post
+
+META_RE = re.compile(r'^[ ]{0,3}(?P<key>[A-Za-z0-9_-]+):\s*(?P<value>.*)')
+META_MORE_RE = re.compile(r'^[ ]{4,}(?P<value>.*)')
+BEGIN_RE = re.compile(r'^-{3}(\s.*)?')
+END_RE = re.compile(r'^(-{3}|\.{3})(\s.*)?')
+TITLE_RE = re.compile(r'[a-zA-Z0-9]+')
+
+
+def parse_frontmatter(lines):
+    """Parse metadata from an iterable of source lines.
+
+    Stops reading at the first line that ends the header.
+
+    Returns:
+        Dict of lower-cased keys to lists of values, like Markdown.Meta.
+    """
+    meta = {}
+    key = None
+    for n, line in enumerate(lines):
+        line = line.rstrip('\r\n').expandtabs(4)
+        if n == 0 and BEGIN_RE.match(line):
+            continue
+        if line.strip() == '' or END_RE.match(line):
+            break
+        m1 = META_RE.match(line)
+        if m1:
+            key = m1.group('key').lower().strip()
+            meta.setdefault(key, []).append(m1.group('value').strip())
+            continue
+        m2 = META_MORE_RE.match(line)
+        if m2 and key:
+            meta[key].append(m2.group('value').strip())
+        else:
+            break
+    return meta
+
+
+def read_frontmatter(path):
+    """Read the metadata header of a markdown file without reading its body."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_frontmatter(f)
+
+
+def is_post(meta):
+    """True if meta describes a publishable post, i.e. has a usable title."""
+    try:
+        return TITLE_RE.match(meta['title'][0]) is not None
+    except (KeyError, IndexError):
+        return False
+
+
+def post_summary(meta):
+    """Return the listing fields for a post, or None if meta is not a post.
+
+    Returns:
+        Dict with title, date, slug, link and image (the last two may be None).
+    """
+    if not is_post(meta):
+        return None
+    return Post(meta).summary()
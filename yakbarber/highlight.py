@@ -0,0 +1,91 @@
+"""Build-time syntax highlighting of code blocks for Yak Barber.
+
+Highlighting needs Pygments, which is only imported when [markdown]
+highlight is set.
+"""
+
+import re
+import hashlib
+from html import unescape
+
+from markdown.extensions import Extension
+from markdown.postprocessors import Postprocessor
+
+# Code blocks as Markdown writes them, with the language fenced_code adds.
+CODE_BLOCK_RE = re.compile(r'<pre><code(?: class="language-([^"\s]+)")?>(.*?)</code></pre>', re.S)
+# Highlighted blocks kept per process; the cache is emptied when it fills.
+CACHE_SIZE = 4096
+
+_cache = {}
+
+
+def _import_pygments():
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        raise ImportError(
+            "Syntax highlighting requires the 'Pygments' package. Install it with: pip install Pygments"
+        )
+    return highlight, HtmlFormatter, get_lexer_by_name, ClassNotFound
+
+
+def highlight_block(language, code):
+    """Return Pygments HTML for code, or None if language has no lexer.
+
+    Results are cached by a hash of the language and code, so a block
+    shared by several posts, or a post converted again, is only
+    highlighted once per process.
+    """
+    key = hashlib.sha1(f'{language}\0{code}'.encode('utf-8')).hexdigest()
+    if key in _cache:
+        return _cache[key]
+    highlight, HtmlFormatter, get_lexer_by_name, ClassNotFound = _import_pygments()
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        result = None
+    else:
+        result = highlight(code, lexer, HtmlFormatter(cssclass='highlight', wrapcode=True))
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[key] = result
+    return result
+
+
+def highlight_css(style):
+    """Return the stylesheet for highlighted blocks in the named Pygments style."""
+    _, HtmlFormatter, _, _ = _import_pygments()
+    return HtmlFormatter(style=style).get_style_defs('.highlight') + '\n'
+
+
+class HighlightPostprocessor(Postprocessor):
+    """Replaces code blocks tagged with a language by their highlighted HTML."""
+
+    def _replace(self, match):
+        language = match.group(1)
+        if language is None:
+            return match.group()
+        highlighted = highlight_block(language, unescape(match.group(2)))
+        return match.group() if highlighted is None else highlighted.rstrip('\n')
+
+    def run(self, text):
+        if '<pre><code class="language-' not in text:
+            return text
+        return CODE_BLOCK_RE.sub(self._replace, text)
+
+
+class HighlightExtension(Extension):
+    """Highlights code blocks that name a language, such as fenced ```python blocks.
+
+    Blocks without a language, or with one Pygments doesn't know, are left
+    as plain <pre><code> blocks.
+    """
+
+    def extendMarkdown(self, md):
+        _import_pygments()
+        md.registerExtension(self)
+        # Runs after the stashed fenced blocks are put back into the output.
+        md.postprocessors.register(HighlightPostprocessor(md), 'highlight', 5)
@@ -0,0 +1,150 @@
+"""Persistent build manifest for Yak Barber's incremental builds."""
+
+import os
+import json
+import hashlib
+import dataclasses
+
+from .utils import save_json
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Settings that change how a build runs but not what it renders. Precompression
+# keeps its own cache, so toggling it doesn't re-render pages.
+BUILD_OPTIONS = (
+    'incremental', 'cache_dir', 'jobs', 'render_concurrency', 'watch_debounce', 'report_path',
+    'search_buffer', 'gzip_output', 'brotli_output', 'fragment_cache', 'fragment_cache_mb',
+)
+# Files in template_dir that pages are rendered from. Everything else there
+# is a resource copied as is.
+TEMPLATE_SUFFIXES = ('.html', '.xml')
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def data_hash(data):
+    """Return the SHA-256 hex digest of a JSON-serialisable value."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def settings_fingerprint(settings):
+    """Fingerprint the settings that influence rendered output."""
+    values = dataclasses.asdict(settings)
+    for option in BUILD_OPTIONS:
+        values.pop(option, None)
+    return data_hash(values)
+
+
+def template_hashes(template_dir, resources=False):
+    """Hash the templates in template_dir, keyed by file name.
+
+    Resources are only hashed when resources is true, as when pages link to
+    them by fingerprinted name.
+    """
+    hashes = {}
+    for name in sorted(os.listdir(template_dir)):
+        full_path = os.path.join(template_dir, name)
+        if os.path.isfile(full_path) and (resources or name.endswith(TEMPLATE_SUFFIXES)):
+            hashes[name] = file_hash(full_path)
+    return hashes
+
+
+class BuildManifest:
+    """On-disk record of source hashes and cached results from the last build.
+
+    Post entries are keyed by source path and hold the source hash and stat,
+    the frontmatter summary, the converted [Meta, html] pair and the
+    rendered metadata. Output entries map
+    an output path to the key it was last generated from.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        if data.get('version') != MANIFEST_VERSION:
+            data = {}
+        self.settings = data.get('settings')
+        self.templates = data.get('templates', {})
+        self.posts = data.get('posts', {})
+        self.outputs = data.get('outputs', {})
+
+    @classmethod
+    def load(cls, settings):
+        """Load the manifest from cache_dir, or start an empty one."""
+        path = os.path.join(settings.cache_dir, MANIFEST_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        return cls(path, data)
+
+    def update_fingerprints(self, settings):
+        """Compare settings and templates with the last build.
+
+        Changed settings invalidate everything. Changed templates keep
+        cached markdown conversions but force every post to re-render, as
+        do changed resources when they are fingerprinted.
+        """
+        fingerprint = settings_fingerprint(settings)
+        templates = template_hashes(settings.template_dir, settings.fingerprint_assets)
+        if fingerprint != self.settings:
+            self.posts = {}
+            self.outputs = {}
+        elif templates != self.templates:
+            for entry in self.posts.values():
+                entry.pop('rendered', None)
+            self.outputs = {}
+        self.settings = fingerprint
+        self.templates = templates
+
+    def cached_post(self, source, digest):
+        """Return the cache entry for source if its hash still matches."""
+        entry = self.posts.get(source)
+        if entry is not None and entry.get('hash') == digest:
+            return entry
+        return None
+
+    def is_fresh(self, output_path, key):
+        """True if output_path exists and was last generated from key."""
+        return self.outputs.get(output_path) == key and os.path.exists(output_path)
+
+    def record_output(self, output_path, key):
+        self.outputs[output_path] = key
+
+    def post_outputs(self):
+        """Return the output paths of every post page in the manifest."""
+        return {entry['output'] for entry in self.posts.values()
+                if entry.get('post') is not None and 'output' in entry}
+
+    def prune(self, sources, outputs=()):
+        """Forget posts whose source files no longer exist.
+
+        Pages in outputs, the post_outputs() of an earlier build, are deleted
+        unless a remaining post still renders to them, so deleted and
+        retitled posts leave no stale page behind.
+        """
+        for source in set(self.posts) - set(sources):
+            del self.posts[source]
+        for output_path in set(outputs) - self.post_outputs():
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+    def save(self):
+        data = {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'templates': self.templates,
+            'posts': self.posts,
+            'outputs': self.outputs,
+        }
+        save_json(self.path, data)
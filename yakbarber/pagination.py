@@ -0,0 +1,65 @@
+"""Page model for Yak Barber's paginated listings."""
+
+import re
+from dataclasses import dataclass, field
+
+PAGINATION_MODES = ('newest', 'stable')
+
+# File names of listing pages other than index.html, in either mode.
+PAGE_FILE_RE = re.compile(r'(?:index|page)\d+\.html')
+
+
+@dataclass
+class Page:
+    """One listing page.
+
+    previous and next are the file names of the older and newer neighbouring
+    pages, or None at either end.
+    """
+    file_name: str
+    posts: list = field(default_factory=list)
+    previous: str = None
+    next: str = None
+
+
+def paginate(posts, per_page, mode='newest'):
+    """Split posts, newest first, into linked pages.
+
+    In 'newest' mode the first per_page posts go to index.html, the next to
+    index2.html and so on, so every page changes when a post is added.
+
+    In 'stable' mode older pages are fixed buckets of per_page posts counted
+    from the oldest post and named page1.html, page2.html and so on. index.html
+    holds the newest, partly filled bucket together with the full bucket
+    before it, so it always shows between per_page and 2 * per_page - 1 posts.
+    A new post only changes index.html, plus at most two older pages when a
+    bucket fills up.
+
+    Returns:
+        List of Page, starting with index.html. Empty if there are no posts.
+
+    Raises:
+        ValueError: If mode is not one of PAGINATION_MODES.
+    """
+    if mode not in PAGINATION_MODES:
+        raise ValueError(f"Unknown pagination mode {mode!r}; expected one of {', '.join(PAGINATION_MODES)}")
+    if not posts:
+        return []
+    total = len(posts)
+    if mode == 'stable':
+        buckets = -(-total // per_page)
+        newest = total - (buckets - 1) * per_page
+        home = newest if newest == per_page or buckets == 1 else newest + per_page
+        pages = [Page('index.html', posts[:home])]
+        for b in range((total - home) // per_page, 0, -1):
+            start = total - b * per_page
+            pages.append(Page(f'page{b}.html', posts[start:start + per_page]))
+    else:
+        pages = [
+            Page('index.html' if n == 1 else f'index{n}.html', posts[start:start + per_page])
+            for n, start in enumerate(range(0, total, per_page), 1)
+        ]
+    for older, newer in zip(pages[1:], pages):
+        newer.previous = older.file_name
+        older.next = newer.file_name
+    return pages
@@ -0,0 +1,126 @@
+"""The Post record shared by Yak Barber's build stages."""
+
+import datetime
+import threading
+
+import markdown
+
+from .utils import post_slug, term_slug, filter_html, rfc3339_format
+
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+# Markdown processors for titles, one per thread since rendering is threaded.
+_title_processors = threading.local()
+
+
+def parse_date(value):
+    """Parse a frontmatter date, or return None if it has no known format."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def archive_url(settings, kind, name):
+    """Return the URL of the first archive page for a category or tag."""
+    return f"{settings.web_root}{kind}/{term_slug(name)}/index.html"
+
+
+def display_title(title):
+    """Render a title with smart punctuation and return it as plain text."""
+    md = getattr(_title_processors, 'md', None)
+    if md is None:
+        md = _title_processors.md = markdown.Markdown(extensions=['smarty'])
+    md.reset()
+    return filter_html(md.convert(title))[1]
+
+
+class Post:
+    """A converted post with its derived fields computed once.
+
+    Args:
+        meta: Metadata in Markdown.Meta form (lower-cased keys to lists of values).
+        content: Converted HTML body, or None for a frontmatter-only record.
+        source: Optional content path the post was read from.
+    """
+
+    __slots__ = (
+        'source', 'meta', 'content', 'title', 'date', 'datetime', 'slug', 'link', 'image',
+        'category', 'tags', '_display_title',
+    )
+
+    def __init__(self, meta, content=None, source=None):
+        self.source = source
+        self.meta = {k: v[0] for k, v in meta.items()}
+        self.content = content
+        self.title = self.meta['title']
+        self.date = str(self.meta.get('date', ''))
+        self.datetime = parse_date(self.date)
+        self.slug = post_slug(self.title, self.date)
+        self.link = self.meta.get('link')
+        self.image = self.meta.get('image')
+        self.category = self.meta.get('category') or None
+        # Tags are comma-separated and may continue over several lines.
+        self.tags = [t.strip() for v in meta.get('tags', []) for t in v.split(',') if t.strip()]
+        self._display_title = None
+
+    @classmethod
+    def from_converted(cls, converted, source=None):
+        """Build a Post from an open_convert [Meta, html] result."""
+        return cls(converted[0], converted[1], source)
+
+    @property
+    def display_title(self):
+        if self._display_title is None:
+            self._display_title = display_title(self.title)
+        return self._display_title
+
+    @property
+    def updated(self):
+        """The date as an RFC 3339 UTC timestamp, or None if it could not be parsed."""
+        if self.datetime is None:
+            return None
+        return rfc3339_format(self.datetime)
+
+    def url(self, web_root):
+        return web_root + self.slug + '.html'
+
+    def summary(self):
+        return {
+            'title': self.title,
+            'date': self.date,
+            'slug': self.slug,
+            'link': self.link,
+            'image': self.image,
+        }
+
+    def context(self, settings):
+        """Return the template variables for this post's page."""
+        context = dict(self.meta)
+        context.update({
+            'content': self.content,
+            'sitename': settings.site_name,
+            'webRoot': settings.web_root,
+            'author': settings.author,
+            'typekitId': settings.typekit_id,
+            'twitterHandle': settings.twitter_handle,
+            'fediHandle': settings.fedi_handle,
+            'analyticsDomain': settings.analytics_domain,
+            'date': self.date,
+            'image': self.image if 'image' in self.meta else settings.ogp_default_image,
+            'postURL': self.url(settings.web_root),
+            'title': self.display_title,
+        })
+        if self.datetime is not None:
+            context['atomDate'] = self.updated
+        if settings.archive_categories and self.category and term_slug(self.category):
+            context['category-page'] = archive_url(settings, 'category', self.category)
+        if settings.archive_tags and self.tags:
+            context['tag-pages'] = [
+                {'tag': tag, 'tag-page': archive_url(settings, 'tag', tag)}
+                for tag in self.tags if term_slug(tag)
+            ]
+            context['tagged'] = bool(context['tag-pages'])
+        return context
@@ -0,0 +1,138 @@
+"""Responsive image derivatives for Yak Barber.
+
+Resizing needs Pillow, which is only imported when [images] widths is set.
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from .utils import save_json
+
+DERIVATIVE_MANIFEST_NAME = 'derivatives.json'
+
+# Pillow format names and file extensions for each supported output format.
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'avif': ('AVIF', 'avif'),
+    'jpeg': ('JPEG', 'jpg'),
+    'png': ('PNG', 'png'),
+}
+
+# EXIF orientations that rotate the image by 90 degrees.
+_ROTATED = (5, 6, 7, 8)
+
+
+def _import_pillow():
+    try:
+        from PIL import Image, ImageOps, features
+    except ImportError:
+        raise ImportError(
+            "Responsive images require the 'Pillow' package. Install it with: pip install Pillow"
+        )
+    return Image, ImageOps, features
+
+
+def _encode(job):
+    """Write one resized derivative. Runs in a worker process."""
+    source_file, dest_file, width, pil_format, quality = job
+    Image, ImageOps, _ = _import_pillow()
+    with Image.open(source_file) as img:
+        img = ImageOps.exif_transpose(img)
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        temp_path = dest_file + '.tmp'
+        img.save(temp_path, format=pil_format, quality=quality)
+    os.replace(temp_path, dest_file)
+
+
+class ResponsiveImages:
+    """Plans and encodes resized copies of published images.
+
+    Derivative file names include a hash of the source content and the
+    encoding parameters, so a derivative that already exists on disk is never
+    encoded again. Source dimensions are cached by content hash. Encoding is
+    deferred to run(), which spreads the work over a process pool.
+    """
+
+    def __init__(self, settings):
+        Image, _, features = _import_pillow()
+        self._image = Image
+        self.widths = sorted(set(settings.image_widths))
+        self.quality = settings.image_quality
+        self.jobs = max(1, settings.jobs)
+        self.format = settings.image_format.lower()
+        if self.format not in FORMATS or (
+                self.format in ('webp', 'avif') and not features.check(self.format)):
+            # Fall back to each source's own format.
+            self.format = None
+        self.path = os.path.join(settings.cache_dir, DERIVATIVE_MANIFEST_NAME)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sizes = json.load(f)
+        except (OSError, ValueError):
+            self.sizes = {}
+        self.pending = []
+
+    def _source_info(self, source_file, digest):
+        """Return [width, format] for a source image, reading only its header."""
+        info = self.sizes.get(digest)
+        if info is None:
+            with self._image.open(source_file) as img:
+                width = img.width
+                if img.getexif().get(0x0112) in _ROTATED:
+                    width = img.height
+                info = [width, (img.format or '').lower()]
+            self.sizes[digest] = info
+        return info
+
+    def srcset(self, source_file, digest, dest_file, url):
+        """Plan derivatives of a published image and return its srcset value.
+
+        Args:
+            source_file: Source image path.
+            digest: SHA-256 of the source image.
+            dest_file: Where the full-size image was published.
+            url: Public URL of the full-size image.
+
+        Returns:
+            A srcset string listing the derivatives and the original, or None
+            if the image is no wider than the smallest configured width.
+        """
+        width, source_format = self._source_info(source_file, digest)
+        widths = [w for w in self.widths if w < width]
+        fmt = self.format or source_format
+        if not widths or fmt not in FORMATS:
+            return None
+        pil_format, ext = FORMATS[fmt]
+        dest_dir = os.path.dirname(dest_file)
+        url_dir = url[:len(url) - len(os.path.basename(url))]
+        stem = os.path.splitext(os.path.basename(dest_file))[0]
+        candidates = []
+        for w in widths:
+            key = hashlib.sha256(f'{digest}:{w}:{fmt}:{self.quality}'.encode()).hexdigest()[:12]
+            name = f'{stem}-{w}w-{key}.{ext}'
+            derivative = os.path.join(dest_dir, name)
+            if not os.path.exists(derivative):
+                self.pending.append((source_file, derivative, w, pil_format, self.quality))
+            candidates.append(f'{url_dir}{name} {w}w')
+        candidates.append(f'{url} {width}w')
+        return ', '.join(candidates)
+
+    def run(self):
+        """Encode every planned derivative that isn't on disk yet."""
+        pending = list({job[1]: job for job in self.pending}.values())
+        self.pending = []
+        if self.jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(pending))) as pool:
+                list(pool.map(_encode, pending))
+        else:
+            for job in pending:
+                _encode(job)
+        return len(pending)
+
+    def save(self):
+        save_json(self.path, self.sizes)
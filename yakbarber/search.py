@@ -0,0 +1,261 @@
+"""Prebuilt, sharded full-text search index for Yak Barber.
+
+The published index lives in output_dir/search/. docs.json lists every
+indexed post as [title, url, date] by document id, and shard-NNN.json maps
+each term to its posting list. Terms are assigned to shards by the FNV-1a
+hash of their UTF-8 bytes, so a client only fetches the shards its query
+needs. A posting list is a sequence of (doc id delta, term frequency) pairs,
+each number LEB128 varint encoded, and the bytes base64 encoded.
+
+Incremental builds keep a doc-major copy of every shard in
+cache_dir/search/ and only rebuild shards whose posts changed. They give
+new posts the next unused id and leave the ids of deleted posts unused, so
+their output answers every query like a full build's does but is not
+byte-identical to it: ids are only in date order, and docs.json only free of
+null entries, after a full build or a compaction (see MAX_UNUSED_IDS).
+Tokenized posts are buffered up to settings.search_buffer postings and
+spilled to disk beyond that, so memory use stays bounded on large sites.
+"""
+
+import os
+import re
+import json
+import base64
+import shutil
+import hashlib
+import tempfile
+
+from .utils import filter_html, safe_mkdir, save_json, write_if_changed
+from .stats import BuildStats
+
+INDEX_VERSION = 1
+CACHE_DIR = 'search'
+TOKEN_RE = re.compile(r'\w+')
+SHARD_RE = re.compile(r'shard-(\d+)\.json')
+MAX_TOKEN_LENGTH = 32
+# Title words count this many times over body words.
+TITLE_WEIGHT = 5
+# Incremental builds never reuse document ids, so deleted posts leave unused
+# ids in docs.json. The index is rebuilt with compact ids once more than this
+# fraction of the ids would be unused.
+MAX_UNUSED_IDS = 0.25
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have he i in is it its of on or '
+    'she that the their them they this to was were will with you your'.split()
+)
+
+
+def tokenize(text):
+    """Split text into lower-cased search terms, dropping stop words."""
+    return [
+        t for t in TOKEN_RE.findall(text.lower())
+        if len(t) > 1 and len(t) <= MAX_TOKEN_LENGTH and t not in STOP_WORDS
+    ]
+
+
+def post_terms(post):
+    """Return the term frequencies of a rendered post's title and body."""
+    terms = {}
+    for term in tokenize(filter_html(post['content'], ('script', 'style'))[1]):
+        terms[term] = terms.get(term, 0) + 1
+    for term in tokenize(post['title']):
+        terms[term] = terms.get(term, 0) + TITLE_WEIGHT
+    return terms
+
+
+def shard_of(term, shards):
+    """Return the shard number for term, using 32-bit FNV-1a."""
+    h = 0x811c9dc5
+    for byte in term.encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h % shards
+
+
+def encode_postings(postings):
+    """Encode sorted (doc id, frequency) pairs as base64 varints of id deltas and frequencies."""
+    out = bytearray()
+    previous = 0
+    for doc_id, tf in postings:
+        for n in (doc_id - previous, tf):
+            while n >= 0x80:
+                out.append((n & 0x7f) | 0x80)
+                n >>= 7
+            out.append(n)
+        previous = doc_id
+    return base64.b64encode(bytes(out)).decode('ascii')
+
+
+def decode_postings(data):
+    """Decode an encode_postings string back into (doc id, frequency) pairs."""
+    numbers = []
+    n = shift = 0
+    for byte in base64.b64decode(data):
+        n |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            numbers.append(n)
+            n = shift = 0
+    postings = []
+    doc_id = 0
+    for delta, tf in zip(numbers[::2], numbers[1::2]):
+        doc_id += delta
+        postings.append((doc_id, tf))
+    return postings
+
+
+def _digest(post):
+    return hashlib.sha1((post['title'] + '\0' + post['content']).encode('utf-8')).hexdigest()
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class _UpdateBuffer:
+    """Per-shard term maps of changed posts, spilled to disk past a posting budget."""
+
+    def __init__(self, shards, budget, spill_dir):
+        self.shards = shards
+        self.budget = budget
+        self.spill_dir = spill_dir
+        self.pending = {}
+        self.size = 0
+        self.spilled = set()
+
+    def add(self, doc_id, terms):
+        """Add a post's terms and return the shard numbers they fall in."""
+        by_shard = {}
+        for term, tf in terms.items():
+            by_shard.setdefault(shard_of(term, self.shards), {})[term] = tf
+        for shard, shard_terms in by_shard.items():
+            self.pending.setdefault(shard, {})[doc_id] = shard_terms
+        self.size += len(terms)
+        if self.size > self.budget:
+            self.spill()
+        return sorted(by_shard)
+
+    def spill(self):
+        for shard, docs in self.pending.items():
+            with open(os.path.join(self.spill_dir, f'{shard}.jsonl'), 'a', encoding='utf-8') as f:
+                for doc_id, terms in docs.items():
+                    f.write(json.dumps([doc_id, terms], ensure_ascii=False) + '\n')
+            self.spilled.add(shard)
+        self.pending = {}
+        self.size = 0
+
+    def docs(self, shard):
+        """Yield (doc id, terms) for shard, spilled entries first."""
+        if shard in self.spilled:
+            with open(os.path.join(self.spill_dir, f'{shard}.jsonl'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    doc_id, terms = json.loads(line)
+                    yield doc_id, terms
+        yield from self.pending.get(shard, {}).items()
+
+
+def _unused_ids(state, posts):
+    """Return how many ids in state would be left unused by indexing posts."""
+    return state['next_id'] - sum(1 for post in posts if post['postURL'] in state['docs'])
+
+
+def search_index(posts, settings, incremental=False, stats=None):
+    """Write the search index for posts to output_dir/search/.
+
+    Args:
+        posts: Rendered post metadata, newest first.
+        settings: SiteSettings instance.
+        incremental: Reuse the cached index and only re-tokenize posts whose
+            title or content changed. Otherwise, or when more than
+            MAX_UNUSED_IDS of the ids would be unused, the index is rebuilt.
+        stats: Optional BuildStats.
+    """
+    stats = stats or BuildStats()
+    shards = settings.search_shards
+    out_dir = os.path.join(settings.output_dir, 'search')
+    cache_dir = os.path.join(settings.cache_dir, CACHE_DIR)
+    safe_mkdir(out_dir)
+    safe_mkdir(cache_dir)
+    state_path = os.path.join(cache_dir, 'state.json')
+    state = _read_json(state_path, None) if incremental else None
+    if (not state or state.get('version') != INDEX_VERSION or state.get('shards') != shards
+            or _unused_ids(state, posts) > state['next_id'] * MAX_UNUSED_IDS):
+        state = {'version': INDEX_VERSION, 'shards': shards, 'next_id': 0, 'docs': {}}
+        shutil.rmtree(cache_dir)
+        safe_mkdir(cache_dir)
+        # Drop shards left over from a larger search_shards setting.
+        for name in os.listdir(out_dir):
+            match = SHARD_RE.fullmatch(name)
+            if match and int(match.group(1)) >= shards:
+                os.remove(os.path.join(out_dir, name))
+        rebuild = True
+    else:
+        rebuild = False
+    docs = state['docs']
+
+    affected = set(range(shards)) if rebuild else set()
+    stale_ids = set()
+    current = set()
+    titles = {}
+    spill_dir = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        buffer = _UpdateBuffer(shards, settings.search_buffer, spill_dir)
+        # Oldest first, so ids grow with each new post.
+        for post in reversed(posts):
+            url = post['postURL']
+            current.add(url)
+            titles[url] = [post['title'], url, post['date']]
+            digest = _digest(post)
+            entry = docs.get(url)
+            if entry is not None and entry[1] == digest:
+                continue
+            if entry is None:
+                entry = docs[url] = [state['next_id'], digest, []]
+                state['next_id'] += 1
+            else:
+                stale_ids.add(entry[0])
+                affected.update(entry[2])
+                entry[1] = digest
+            entry[2] = buffer.add(entry[0], post_terms(post))
+            affected.update(entry[2])
+            stats.count('search_posts_indexed')
+        for url in set(docs) - current:
+            stale_ids.add(docs[url][0])
+            affected.update(docs.pop(url)[2])
+        # Shards removed from output_dir, say by wiping it, are republished from the cache.
+        affected.update(
+            shard for shard in range(shards)
+            if not os.path.exists(os.path.join(out_dir, f'shard-{shard:03d}.json'))
+        )
+
+        for shard in sorted(affected):
+            cache_path = os.path.join(cache_dir, f'shard-{shard:03d}.json')
+            shard_docs = {} if rebuild else _read_json(cache_path, {})
+            for doc_id in stale_ids:
+                shard_docs.pop(str(doc_id), None)
+            for doc_id, terms in buffer.docs(shard):
+                shard_docs[str(doc_id)] = terms
+            save_json(cache_path, shard_docs)
+            postings = {}
+            for doc_id in sorted(shard_docs, key=int):
+                for term, tf in shard_docs[doc_id].items():
+                    postings.setdefault(term, []).append((int(doc_id), tf))
+            result = json.dumps(
+                {term: encode_postings(postings[term]) for term in sorted(postings)},
+                ensure_ascii=False, separators=(',', ':'),
+            )
+            shard_file = os.path.join(out_dir, f'shard-{shard:03d}.json')
+            stats.record(write_if_changed(shard_file, result), len(result.encode('utf-8')))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    table = [None] * state['next_id']
+    for url, entry in docs.items():
+        table[entry[0]] = titles[url]
+    result = json.dumps({'version': INDEX_VERSION, 'shards': shards, 'docs': table},
+                        ensure_ascii=False, separators=(',', ':'))
+    stats.record(write_if_changed(os.path.join(out_dir, 'docs.json'), result), len(result.encode('utf-8')))
+    save_json(state_path, state)
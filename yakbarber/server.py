@@ -0,0 +1,151 @@
+"""Resident build daemon and local preview server for Yak Barber."""
+
+import json
+import time
+import posixpath
+import threading
+from functools import partial
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from .engine import build
+from .changes import changes_for_paths
+from .manifest import BuildManifest
+from .watch import ChangeHandler, start_observer
+from .fingerprint import FINGERPRINT_RE
+
+API_PREFIX = '/_yakbarber/'
+# Fingerprinted files never change, so browsers may keep them for a year.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class SiteDaemon:
+    """Keeps the site model warm in memory between rebuilds.
+
+    Converted posts and rendered metadata live in an in-memory BuildManifest
+    and parsed templates in the process-wide template registry, so a rebuild
+    only converts and renders what changed. The manifest is written to disk
+    by save(), not after every rebuild.
+    """
+
+    def __init__(self, settings):
+        settings.incremental = True
+        self.settings = settings
+        self.manifest = BuildManifest.load(settings)
+        self.builds = 0
+        self.last_stats = None
+        self.last_duration = None
+        self._lock = threading.Lock()
+        self._status = self._snapshot()
+
+    def rebuild(self, changes=None):
+        """Rebuild the site, or only the parts a ChangeSet affects."""
+        with self._lock:
+            started = time.perf_counter()
+            stats = build(self.settings, changes, self.manifest)
+            self.last_duration = time.perf_counter() - started
+            self.last_stats = stats
+            self.builds += 1
+            self._status = self._snapshot()
+            return stats
+
+    def status(self):
+        """Return counts from the last rebuild, without waiting for a running one."""
+        return dict(self._status)
+
+    def _snapshot(self):
+        posts = sum(1 for entry in self.manifest.posts.values() if entry.get('post'))
+        status = {'builds': self.builds, 'posts': posts}
+        if self.last_stats is not None:
+            status['last_build'] = {
+                'written': self.last_stats.written,
+                'unchanged': self.last_stats.unchanged,
+                'seconds': round(self.last_duration, 4),
+            }
+        return status
+
+    def save(self):
+        with self._lock:
+            self.manifest.save()
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Serves output_dir plus a small JSON API under /_yakbarber/.
+
+    GET /_yakbarber/status reports build counts. POST /_yakbarber/rebuild
+    rebuilds the site; a JSON body of {"paths": [...]} limits the rebuild to
+    what those files affect. Fingerprinted assets are served with a
+    long-lived Cache-Control header.
+    """
+
+    def __init__(self, *args, daemon, **kwargs):
+        self.site = daemon
+        super().__init__(*args, directory=daemon.settings.output_dir, **kwargs)
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if code == 200 and FINGERPRINT_RE.fullmatch(posixpath.basename(urlsplit(self.path).path)):
+            self.send_header('Cache-Control', IMMUTABLE)
+
+    def _send_json(self, code, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == API_PREFIX + 'status':
+            self._send_json(200, self.site.status())
+        elif path.startswith(API_PREFIX):
+            self._send_json(404, {'error': 'unknown endpoint'})
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        if urlsplit(self.path).path != API_PREFIX + 'rebuild':
+            self._send_json(404, {'error': 'unknown endpoint'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        changes = None
+        if length:
+            try:
+                paths = json.loads(self.rfile.read(length))['paths']
+            except (ValueError, KeyError, TypeError):
+                paths = None
+            if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+                self._send_json(400, {'error': 'expected {"paths": [...]}'})
+                return
+            changes = changes_for_paths(paths, self.site.settings)
+        try:
+            self.site.rebuild(changes)
+        except Exception as e:
+            self.log_error('rebuild failed: %r', e)
+            self._send_json(500, {'error': f'rebuild failed: {type(e).__name__}: {e}'})
+            return
+        self._send_json(200, self.site.status())
+
+
+def make_server(daemon, host='127.0.0.1', port=8000):
+    """Create an HTTP server previewing daemon's output_dir."""
+    return ThreadingHTTPServer((host, port), partial(PreviewHandler, daemon=daemon))
+
+
+def serve(settings, host='127.0.0.1', port=8000):
+    """Build the site, then serve it while rebuilding changes in memory."""
+    daemon = SiteDaemon(settings)
+    print(daemon.rebuild().status_line())
+    observer = start_observer(settings, ChangeHandler(settings, daemon.rebuild))
+    httpd = make_server(daemon, host, port)
+    print(f"Serving {settings.output_dir} at http://{host}:{port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        observer.stop()
+        observer.join()
+        daemon.save()
@@ -3,6 +3,8 @@
 import sys
 from dataclasses import dataclass, field
 
+from .pagination import PAGINATION_MODES
+
 if sys.version_info >= (3, 11):
     import tomllib
 else:
@@ -26,20 +28,65 @@ class SiteSettings:
     author: str = ""
     ogp_default_image: str = ""
     posts_per_page: int = 10
+    pagination: str = "newest"
     typekit_id: str = ""
     twitter_handle: str = ""
     fedi_handle: str = ""
     analytics_domain: str = ""
+    incremental: bool = False
+    cache_dir: str = ".yakbarber-cache/"
+    jobs: int = 1
+    render_concurrency: int = 8
+    watch_debounce: float = 0.1
+    report_path: str = ""
+    fragment_cache: bool = False
+    fragment_cache_mb: int = 64
+    image_links: bool = True
+    image_widths: list = field(default_factory=list)
+    image_format: str = "webp"
+    image_quality: int = 80
+    feed_entries: int = 50
+    feed_archive: bool = False
+    feed_strip_tags: list = field(default_factory=lambda: ['script', 'object', 'iframe'])
+    archive_categories: bool = True
+    archive_tags: bool = True
+    archive_feeds: bool = True
+    archive_dates: bool = True
+    post_index_json: bool = True
+    search_enabled: bool = False
+    search_shards: int = 64
+    search_buffer: int = 500000
+    minify_output: bool = False
+    gzip_output: bool = False
+    brotli_output: bool = False
+    fingerprint_assets: bool = False
+    highlight_code: bool = False
+    highlight_style: str = "solarized-dark"
 
 
 def load_settings(path: str) -> SiteSettings:
-    """Load settings from a TOML file and return a SiteSettings instance."""
+    """Load settings from a TOML file and return a SiteSettings instance.
+
+    Raises ValueError if [site] pagination is not a known mode.
+    """
     with open(path, "rb") as f:
         data = tomllib.load(f)
 
     site = data.get("site", {})
+    pagination = site.get("pagination", "newest")
+    if pagination not in PAGINATION_MODES:
+        raise ValueError(
+            f"Unknown [site] pagination {pagination!r} in {path}; expected one of {', '.join(PAGINATION_MODES)}"
+        )
     integrations = data.get("integrations", {})
     social = data.get("social", {})
+    build = data.get("build", {})
+    feed = data.get("feed", {})
+    images = data.get("images", {})
+    archives = data.get("archives", {})
+    search = data.get("search", {})
+    output = data.get("output", {})
+    md = data.get("markdown", {})
 
     return SiteSettings(
         root=site.get("root", "./"),
@@ -52,8 +99,38 @@ def load_settings(path: str) -> SiteSettings:
         author=site.get("author", ""),
         ogp_default_image=site.get("ogp_default_image", ""),
         posts_per_page=site.get("posts_per_page", 10),
+        pagination=pagination,
         typekit_id=integrations.get("typekit_id", ""),
         twitter_handle=social.get("twitter_handle", ""),
         fedi_handle=social.get("fedi_handle", ""),
         analytics_domain=integrations.get("analytics_domain", ""),
+        incremental=build.get("incremental", False),
+        cache_dir=build.get("cache_dir", ".yakbarber-cache/"),
+        jobs=build.get("jobs", 1),
+        render_concurrency=build.get("render_concurrency", 8),
+        watch_debounce=build.get("watch_debounce", 0.1),
+        report_path=build.get("report", ""),
+        fragment_cache=build.get("fragment_cache", False),
+        fragment_cache_mb=build.get("fragment_cache_mb", 64),
+        image_links=images.get("links", True),
+        image_widths=images.get("widths", []),
+        image_format=images.get("format", "webp"),
+        image_quality=images.get("quality", 80),
+        feed_entries=feed.get("entries", 50),
+        feed_archive=feed.get("archive", False),
+        feed_strip_tags=feed.get("strip_tags", ['script', 'object', 'iframe']),
+        archive_categories=archives.get("categories", True),
+        archive_tags=archives.get("tags", True),
+        archive_feeds=archives.get("feeds", True),
+        archive_dates=archives.get("dates", True),
+        post_index_json=archives.get("json", True),
+        search_enabled=search.get("enabled", False),
+        search_shards=search.get("shards", 64),
+        search_buffer=search.get("buffer", 500000),
+        minify_output=output.get("minify", False),
+        gzip_output=output.get("gzip", False),
+        brotli_output=output.get("brotli", False),
+        fingerprint_assets=output.get("fingerprint", False),
+        highlight_code=md.get("highlight", False),
+        highlight_style=md.get("highlight_style", "solarized-dark"),
     )
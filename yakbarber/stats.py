@@ -0,0 +1,92 @@
+"""Build statistics for Yak Barber."""
+
+import json
+import time
+import datetime
+from contextlib import contextmanager
+
+from . import __version__
+
+
+class BuildStats:
+    """Counts output files, per-phase timings and other counters for a build.
+
+    Phase CPU times cover the main process only; work done in --jobs worker
+    processes shows up in wall time but not CPU time.
+    """
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.phases = {}
+        self.counters = {}
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.wall = None
+        self.cpu = None
+
+    def record(self, changed, nbytes=0):
+        """Record one output file; changed is True if nbytes were (re)written."""
+        if changed:
+            self.written += 1
+            self.count('bytes_written', nbytes)
+        else:
+            self.unchanged += 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block, adding to any earlier time for name."""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            timing = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+            timing['wall'] += time.perf_counter() - wall_start
+            timing['cpu'] += time.process_time() - cpu_start
+
+    def finish(self):
+        """Stop the build-wide clocks."""
+        self.wall = time.perf_counter() - self._wall_start
+        self.cpu = time.process_time() - self._cpu_start
+
+    def summary(self):
+        return f"{self.written} files changed, {self.unchanged} unchanged"
+
+    def status_line(self):
+        """Return the one-line message printed after a build."""
+        return f"Build complete: {self.summary()} in {self.wall:.2f}s"
+
+    def to_dict(self):
+        return {
+            'version': __version__,
+            'started_at': self.started_at.isoformat(),
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'files': {'written': self.written, 'unchanged': self.unchanged},
+            'phases': self.phases,
+            'counters': self.counters,
+        }
+
+    def write_report(self, path):
+        """Write the build report as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def report_text(self):
+        """Return a human-readable table of phase timings and counters."""
+        lines = [f"{'phase':<20} {'wall (s)':>10} {'cpu (s)':>10}"]
+        for name, timing in self.phases.items():
+            lines.append(f"{name:<20} {timing['wall']:>10.3f} {timing['cpu']:>10.3f}")
+        if self.wall is not None:
+            lines.append(f"{'total':<20} {self.wall:>10.3f} {self.cpu:>10.3f}")
+        lines.append('')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<20} {value:>10}")
+        lines.append(self.summary())
+        return '\n'.join(lines)
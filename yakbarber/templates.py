@@ -0,0 +1,60 @@
+"""Compiled Mustache template cache for Yak Barber."""
+
+import os
+
+import pystache
+from pystache.renderer import Renderer
+
+
+class TemplateRegistry:
+    """Loads and parses each template in a template directory once.
+
+    Parsed templates are reused for every render. refresh() drops entries
+    whose file changed on disk, so a long-running watch process picks up
+    template edits on its next build.
+    """
+
+    def __init__(self, template_dir):
+        self.template_dir = template_dir
+        self._templates = {}
+
+    def _stat(self, name):
+        st = os.stat(os.path.join(self.template_dir, name))
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, name):
+        """Return the parsed template for name, loading it on first use."""
+        cached = self._templates.get(name)
+        if cached is not None:
+            return cached[1]
+        stamp = self._stat(name)
+        with open(os.path.join(self.template_dir, name), 'r', encoding='utf-8') as f:
+            parsed = pystache.parse(f.read())
+        self._templates[name] = (stamp, parsed)
+        return parsed
+
+    def render(self, name, context):
+        """Render the named template with context."""
+        # Renderers hold per-render state, so each call gets its own.
+        return Renderer().render(self.get(name), context)
+
+    def refresh(self):
+        """Forget templates that changed or disappeared since they were loaded."""
+        for name, (stamp, _) in list(self._templates.items()):
+            try:
+                current = self._stat(name)
+            except OSError:
+                current = None
+            if current != stamp:
+                del self._templates[name]
+
+
+_registries = {}
+
+
+def get_registry(template_dir):
+    """Return the process-wide TemplateRegistry for template_dir."""
+    registry = _registries.get(template_dir)
+    if registry is None:
+        registry = _registries[template_dir] = TemplateRegistry(template_dir)
+    return registry
@@ -2,12 +2,16 @@
 
 import os
 import re
+import json
+import shutil
+import filecmp
 import datetime
-import time
+import threading
+from html import unescape
+from html.parser import HTMLParser
 from itertools import islice
 
 import pytz
-from bs4 import BeautifulSoup
 
 
 def safe_mkdir(path):
@@ -16,6 +20,104 @@ def safe_mkdir(path):
         os.makedirs(path)
 
 
+def _temp_path(path):
+    """Return a temporary sibling of path, unique to this process and thread."""
+    return f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+
+
+def replace_if_changed(temp_path, path):
+    """Move temp_path over path unless both files hold the same bytes.
+
+    Returns:
+        True if path was replaced, False if it was already identical.
+    """
+    if os.path.exists(path) and filecmp.cmp(temp_path, path, shallow=False):
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, path)
+    return True
+
+
+def write_if_changed(path, content):
+    """Atomically write a UTF-8 string to path unless the file already holds it.
+
+    The existing file is only read when its size matches the new content.
+
+    Returns:
+        True if the file was written, False if it was left untouched.
+    """
+    data = content.encode('utf-8')
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    temp_path = _temp_path(path)
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return True
+
+
+def save_json(path, data):
+    """Atomically write data to path as compact JSON, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = _temp_path(path)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def copy_if_changed(src, dst):
+    """Atomically copy src to dst unless dst already holds the same bytes.
+
+    Returns:
+        True if dst was written, False if it was left untouched.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if (os.path.exists(dst) and os.path.getsize(src) == os.path.getsize(dst)
+            and filecmp.cmp(src, dst, shallow=False)):
+        return False
+    temp_path = _temp_path(dst)
+    shutil.copyfile(src, temp_path)
+    shutil.copymode(src, temp_path)
+    os.replace(temp_path, dst)
+    return True
+
+
+def scan_files(root, suffixes, exclude=()):
+    """Recursively find files under root whose names end with suffixes.
+
+    Hidden files and directories are skipped, as are the directories in
+    exclude and symlinked directories. Directories are read with os.scandir,
+    so the returned entries cache their stat() result for the caller.
+
+    Returns:
+        Dict mapping each file's path relative to root to its os.DirEntry.
+    """
+    exclude = {os.path.abspath(d) for d in exclude}
+    found = {}
+    pending = [(root, '')]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.abspath(entry.path) not in exclude:
+                            pending.append((entry.path, prefix + entry.name + os.sep))
+                    elif entry.name.endswith(suffixes) and entry.is_file():
+                        found[prefix + entry.name] = entry
+        except FileNotFoundError:
+            continue
+    return found
+
+
 def split_every(n, iterable):
     """Split an iterable into chunks of size n."""
     i = iter(iterable)
@@ -33,17 +135,34 @@ def convert_http_to_https(url, web_root):
     return url
 
 
+_ISOLATED_PUNCTUATION_RE = re.compile(r'\s[^a-zA-Z0-9]\s')
+_PUNCTUATION_RE = re.compile(r'[^a-zA-Z0-9\s]+')
+
+
 def remove_punctuation(text):
     """Remove punctuation from text for use in filenames/URLs."""
-    text = re.sub(r'\s[^a-zA-Z0-9]\s', ' ', text)
-    text = re.sub(r'[^a-zA-Z0-9\s]+', '', text)
+    text = _ISOLATED_PUNCTUATION_RE.sub(' ', text)
+    text = _PUNCTUATION_RE.sub('', text)
     text = text.encode('ascii', 'xmlcharrefreplace')
     text = text.decode('utf-8')
     return text
 
 
+def post_slug(title, date):
+    """Return the output file name, without extension, of a post."""
+    post_name = remove_punctuation(title)
+    post_name = date.split(' ')[0] + '-' + post_name.replace(' ', '-').replace('\u2011', '-')
+    return '-'.join(post_name.split('-'))
+
+
+def term_slug(name):
+    """Return the URL path segment for a category or tag name."""
+    return '-'.join(remove_punctuation(name).lower().split())
+
+
 def extract_tags(html, tag):
     """Remove all instances of a given HTML tag from the content."""
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
     to_extract = soup.findAll(tag)
     for item in to_extract:
@@ -53,15 +172,128 @@ def extract_tags(html, tag):
 
 def strip_tags(html):
     """Strip all HTML tags, returning plain text."""
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
     return soup.get_text()
 
 
+# Elements that never have an end tag, so removing one drops just its tag.
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+))
+
+
+class _TagFilter(HTMLParser):
+    """Streaming parser that drops whole elements and collects plain text."""
+
+    def __init__(self, remove_tags):
+        super().__init__(convert_charrefs=False)
+        self.remove_tags = frozenset(remove_tags)
+        self.depth = 0
+        self.html = []
+        self.text = []
+        self._source = ''
+        self._line_starts = [0]
+
+    def feed(self, data):
+        start = len(self._source)
+        self._source += data
+        self._line_starts.extend(start + m.end() for m in re.finditer('\n', data))
+        super().feed(data)
+
+    def _raw_ref(self, prefix, name):
+        """Return a character reference as written, with its semicolon only if it had one."""
+        line, offset = self.getpos()
+        start = self._line_starts[line - 1] + offset
+        end = start + len(prefix) + len(name)
+        if self._source.startswith(';', end):
+            end += 1
+        return self._source[start:end]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.remove_tags:
+            if tag not in VOID_ELEMENTS:
+                self.depth += 1
+        elif not self.depth:
+            self.html.append(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.depth and tag not in self.remove_tags:
+            self.html.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag in self.remove_tags:
+            if self.depth and tag not in VOID_ELEMENTS:
+                self.depth -= 1
+        elif not self.depth:
+            self.html.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if not self.depth:
+            self.html.append(data)
+            self.text.append(data)
+
+    def handle_entityref(self, name):
+        if not self.depth:
+            raw = self._raw_ref('&', name)
+            self.html.append(raw)
+            self.text.append(unescape(raw))
+
+    def handle_charref(self, name):
+        if not self.depth:
+            raw = self._raw_ref('&#', name)
+            self.html.append(raw)
+            self.text.append(unescape(raw))
+
+    def handle_comment(self, data):
+        if not self.depth:
+            self.html.append(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        if not self.depth:
+            self.html.append(f'<!{decl}>')
+
+    def unknown_decl(self, data):
+        if not self.depth:
+            # CDATA sections end with ]]>, other marked sections with ]>.
+            self.html.append(f'<![{data}]]>' if data.startswith('CDATA[') else f'<![{data}]>')
+
+    def handle_pi(self, data):
+        if not self.depth:
+            self.html.append(f'<?{data}>')
+
+
+def filter_html(html, remove_tags=()):
+    """Remove elements and extract plain text from HTML in a single pass.
+
+    Unlike extract_tags and strip_tags this never builds a document tree, and
+    markup outside the removed elements is passed through unchanged, including
+    character references and bare ampersands as they were written.
+
+    Args:
+        html: HTML string to filter.
+        remove_tags: Tag names whose elements, including their contents, are dropped.
+
+    Returns:
+        (filtered_html, text) tuple.
+    """
+    parser = _TagFilter(remove_tags)
+    parser.feed(html)
+    parser.close()
+    return ''.join(parser.html), ''.join(parser.text)
+
+
+# Post dates are in this time zone. The zone is attached with replace(), as
+# it always has been, so published feed timestamps never shift.
+PACIFIC = pytz.timezone('US/Pacific')
+
+
+def rfc3339_format(dt):
+    """Format a naive post datetime as an RFC3339 UTC timestamp for Atom feeds."""
+    return dt.replace(tzinfo=PACIFIC).astimezone(pytz.utc).isoformat().split('+')[0] + 'Z'
+
+
 def rfc3339_convert(time_string):
     """Convert a datetime string to RFC3339 format for Atom feeds."""
-    strip = time.strptime(time_string, '%Y-%m-%d %H:%M:%S')
-    dt = datetime.datetime.fromtimestamp(time.mktime(strip))
-    pacific = pytz.timezone('US/Pacific')
-    ndt = dt.replace(tzinfo=pacific)
-    utc = pytz.utc
-    return ndt.astimezone(utc).isoformat().split('+')[0] + 'Z'
+    return rfc3339_format(datetime.datetime.strptime(time_string, '%Y-%m-%d %H:%M:%S'))
@@ -0,0 +1,73 @@
+"""File watching for Yak Barber's watch and serve modes."""
+
+import threading
+import traceback
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from .engine import build
+from .changes import changes_for_paths
+
+
+class ChangeHandler(FileSystemEventHandler):
+    """Watches content and template directories and rebuilds what changed.
+
+    Changed paths are collected until no new event has arrived for
+    settings.watch_debounce seconds, then rebuilt as one batch. Changes that
+    arrive while a build is running are queued for the next one. A failed
+    build is logged, and its changes are kept for the next one.
+
+    rebuild is called with each ChangeSet; it defaults to engine.build.
+    The BuildStats it returns, if any, are reported after each rebuild.
+    """
+
+    def __init__(self, settings, rebuild=None):
+        self._settings = settings
+        self._rebuild = rebuild or (lambda changes: build(settings, changes))
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+            return
+        paths = [event.src_path]
+        if event.event_type == 'moved':
+            paths.append(event.dest_path)
+        if not changes_for_paths(paths, self._settings):
+            return
+        with self._lock:
+            self._pending.update(paths)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self._settings.watch_debounce, self._run_build)
+            self._timer.start()
+
+    def _run_build(self):
+        with self._build_lock:
+            with self._lock:
+                paths, self._pending = self._pending, set()
+            changes = changes_for_paths(paths, self._settings)
+            if not changes:
+                return
+            print(f"Detected changes in {', '.join(sorted(paths))}. Rebuilding...")
+            try:
+                stats = self._rebuild(changes)
+            except Exception:
+                traceback.print_exc()
+                with self._lock:
+                    self._pending.update(paths)
+                return
+            if stats is not None:
+                print(stats.status_line())
+
+
+def start_observer(settings, handler):
+    """Start a watchdog observer feeding content and template changes to handler."""
+    observer = Observer(timeout=120)
+    observer.schedule(handler, path=settings.content_dir, recursive=True)
+    observer.schedule(handler, path=settings.template_dir, recursive=True)
+    observer.start()
+    return observer